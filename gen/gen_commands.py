@@ -420,6 +420,8 @@ def get_py_arg_decl(
                 match type.removesuffix(".class"):
                     case "int" | "long":
                         py_arg_annot = a.Name("int")
+                    case "double" | "float":
+                        py_arg_annot = a.Name("float")
                     case "Boolean":
                         py_arg_annot = a.Name("bool")
                     case "Arguments.enumStringType(MessageRequestResponseType.class)":
@@ -0,0 +1,145 @@
+import ast as a
+import sys
+
+from .utils import GIT_ROOT, PyImports, gen_py_src
+
+PKG_PATH = GIT_ROOT / "src" / "signal_cli_jsonrpc"
+
+# mirrored modules -> their mirrors
+MIRRORED_MODULES = {
+    "types": "types_structs",
+    "outputs": "outputs_structs",
+}
+
+
+def main():
+    [module] = sys.argv[1:]
+    py_ast = gen(module)
+    py_src = gen_py_src(py_ast)
+    print(py_src)
+
+
+def gen(module: str) -> a.Module:
+    """
+    Mirror the dataclasses of `signal_cli_jsonrpc.<module>` as msgspec `Struct`s with the same
+    names and fields, renamed to camelCase on the wire. Enums are reused rather than mirrored.
+    """
+    py_imports = PyImports()
+    py_src_ast = a.parse((PKG_PATH / f"{module}.py").read_text())
+
+    py_decls = list[a.stmt]()
+    py_other_imports = list[a.stmt]()
+    py_reused_names = list[str]()
+    for py_stmt in py_src_ast.body:
+        match py_stmt:
+            case a.ImportFrom("dataclasses"):
+                pass
+            case a.ImportFrom(mod, names, level=1) if mod in MIRRORED_MODULES:
+                py_other_imports.append(a.ImportFrom(MIRRORED_MODULES[mod], names, level=1))
+            case a.Import() | a.ImportFrom():
+                py_other_imports.append(py_stmt)
+            case a.ClassDef() if is_dataclass(py_stmt):
+                py_decls.append(get_py_struct(py_stmt, (py_stmt.name,), module, py_imports))
+            case a.ClassDef(name=name):
+                py_reused_names.append(name)
+            case a.TypeAlias():
+                py_decls.append(py_stmt)
+            case a.Assign(value=a.Subscript() | a.BinOp()):
+                # type aliases without `type`, which dacite can see through
+                py_decls.append(py_stmt)
+            case _:
+                # `__all__`, and anything else which isn't part of the type model
+                pass
+
+    py_import_decls = [
+        a.ImportFrom(mod, [a.alias(n) for n in names], level=0) for mod, names in py_imports.items()
+    ]
+    if py_reused_names:
+        py_import_decls.append(a.ImportFrom(module, [a.alias(n) for n in py_reused_names], level=1))
+    if any(
+        isinstance(node, a.Name) and node.id == f"dataclass_{module}"
+        for py_decl in py_decls
+        for node in a.walk(py_decl)
+    ):
+        py_import_decls.append(
+            a.ImportFrom(None, [a.alias(module, f"dataclass_{module}")], level=1)
+        )
+
+    py_all_names = list[str]()
+    for py_decl in py_decls:
+        match py_decl:
+            case a.ClassDef(name=name) | a.TypeAlias(a.Name(name)) | a.Assign([a.Name(name)]):
+                py_all_names.append(name)
+    py_all_names.extend(py_reused_names)
+    py_all = a.List([a.Constant(name) for name in py_all_names])
+    py_all_decl = a.Assign([a.Name("__all__")], py_all, lineno=0)
+
+    py_body = list[a.stmt]()
+    py_body.extend(py_import_decls)
+    py_body.extend(py_other_imports)
+    py_body.extend(py_decls)
+    py_body.append(py_all_decl)
+    return a.Module(py_body)
+
+
+def is_dataclass(py_class: a.ClassDef) -> bool:
+    return any(
+        isinstance(deco, a.Name)
+        and deco.id == "dataclass"
+        or isinstance(deco, a.Call)
+        and isinstance(deco.func, a.Name)
+        and deco.func.id == "dataclass"
+        for deco in py_class.decorator_list
+    )
+
+
+def get_py_struct(
+    py_class: a.ClassDef, path: tuple[str, ...], module: str, py_imports: PyImports
+) -> a.ClassDef:
+    # `frozen`, `kw_only` etc. mean the same to `Struct` as they do to `dataclass`
+    py_keywords = [
+        keyword
+        for deco in py_class.decorator_list
+        if isinstance(deco, a.Call)
+        for keyword in deco.keywords
+    ]
+    py_keywords.append(a.keyword("rename", py_imports.add("caseutil", "to_camel")))
+
+    py_body = list[a.stmt]()
+    for py_stmt in py_class.body:
+        match py_stmt:
+            case a.ClassDef() if is_dataclass(py_stmt):
+                py_body.append(get_py_struct(py_stmt, (*path, py_stmt.name), module, py_imports))
+            case a.ClassDef(name=name):
+                # reuse nested enums from the mirrored module
+                py_body.append(
+                    a.Assign(
+                        [a.Name(name)],
+                        _attribute_path(a.Name(f"dataclass_{module}"), (*path, name)),
+                        lineno=0,
+                    )
+                )
+            case a.AnnAssign(value=a.Call(a.Name("field"))):
+                py_imports.add("msgspec", "field")
+                py_body.append(py_stmt)
+            case _:
+                py_body.append(py_stmt)
+
+    return a.ClassDef(
+        name=py_class.name,
+        bases=py_class.bases or [py_imports.add("msgspec", "Struct")],
+        keywords=py_keywords,
+        body=py_body,
+        decorator_list=[],
+        type_params=[],
+    )
+
+
+def _attribute_path(py_base: a.expr, path: tuple[str, ...]) -> a.expr:
+    for name in path:
+        py_base = a.Attribute(py_base, name)
+    return py_base
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Streaming transfer of attachment data, without holding whole (base64-encoded) files in memory.
+"""
+
+import binascii
+import json
+import mimetypes
+import mmap
+import os
+import re
+from base64 import b64encode
+from collections import OrderedDict
+from contextlib import ExitStack
+from dataclasses import replace
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Protocol, Self
+
+from .commands import GetAttachment, GetAvatar, GetSticker, Send
+from .outputs import Empty
+from .session import (
+    RpcRequest,
+    RpcResponseError,
+    SignalCliRPCSession,
+    request_json,
+    response_output,
+)
+
+type AttachmentDataCommand = GetAttachment | GetAvatar | GetSticker
+
+
+class BinaryWriter(Protocol):
+    def write(self, data: bytes, /) -> Any: ...
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_DATA_START = re.compile(rb'"data"\s*:\s*"')
+_MAX_PREAMBLE = 1024 * 1024
+
+
+class _AttachmentDataDecoder:
+    """
+    Incrementally decodes a JSON-RPC response whose `result` is an `AttachmentData`, yielding the
+    base64-decoded bytes of `result.data` as they arrive. Everything around the data string
+    (`id`, or an `error` instead of a `result`) is small, and is collected for `finish`.
+    """
+
+    def __init__(self) -> None:
+        self._envelope = bytearray()
+        self._in_data = False
+        self._data_done = False
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        if self._data_done:
+            self._envelope += chunk
+            return
+        if not self._in_data:
+            self._envelope += chunk
+            if not (match := _DATA_START.search(self._envelope)):
+                if len(self._envelope) > _MAX_PREAMBLE:
+                    raise ValueError("No attachment data found in response")
+                return
+            self._in_data = True
+            chunk = bytes(self._envelope[match.end() :])
+            del self._envelope[match.end() :]
+
+        if (end := chunk.find(b'"')) >= 0:
+            chunk, rest = chunk[:end], chunk[end:]
+            self._data_done = True
+            self._envelope += rest
+        # base64 never needs escaping, but JSON encoders may still escape "/" as "\/"
+        encoded = (self._pending + chunk).replace(b"\\/", b"/")
+        escape = b""
+        if encoded.endswith(b"\\") and not self._data_done:
+            encoded, escape = encoded[:-1], b"\\"
+        usable = len(encoded) if self._data_done else len(encoded) - len(encoded) % 4
+        self._pending = encoded[usable:] + escape
+        if usable:
+            yield binascii.a2b_base64(encoded[:usable], strict_mode=True)
+
+    @property
+    def has_data(self) -> bool:
+        "Whether the response contained a data string (even an empty one)"
+        return self._in_data
+
+    def finish(self) -> dict[str, Any]:
+        "Return the response with `result.data` left out (or emptied)"
+        if self._in_data and not self._data_done:
+            raise ValueError("Response ended inside attachment data")
+        return json.loads(self._envelope)
+
+
+async def download(
+    session: SignalCliRPCSession,
+    command: AttachmentDataCommand,
+    dest: str | os.PathLike[str] | BinaryWriter,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int | None:
+    """
+    Run `command` and write the attachment data it returns to `dest` (a path or writable binary
+    file), decoding base64 as the response streams in. Memory use is bounded by `chunk_size`
+    rather than by the size of the attachment.
+
+    Returns the number of bytes written, or `None` if signal-cli returned no data (in which case
+    nothing is created at a `dest` path).
+    """
+    decoder = _AttachmentDataDecoder()
+    request, response = await session.rpc_response(command)
+    with ExitStack() as stack:
+        stack.callback(response.release)
+        out: BinaryWriter | None = None
+        written = 0
+        async for chunk in response.content.iter_chunked(chunk_size):
+            for data in decoder.feed(chunk):
+                if out is None:
+                    out = _open_dest(stack, dest)
+                out.write(data)
+                written += len(data)
+
+        envelope = decoder.finish()
+        assert envelope.get("id") == request.id
+        if "error" in envelope:
+            raise RpcResponseError(envelope["error"], envelope.get("id"))
+        if not decoder.has_data:
+            return None
+        if out is None:
+            _open_dest(stack, dest)
+        return written
+
+
+def _open_dest(stack: ExitStack, dest: str | os.PathLike[str] | BinaryWriter) -> BinaryWriter:
+    if isinstance(dest, (str, os.PathLike)):
+        return stack.enter_context(open(dest, "wb"))
+    return dest
+
+
+class LocalAttachment(str):
+    """
+    A file to attach to a `Send`, usable anywhere a `Send.attachments` entry is.
+
+    Its string value is the file's path, which is all signal-cli needs when it runs on the same
+    host. `send_streaming` instead inlines it as an RFC 2397 data URI, base64-encoding the file
+    from disk while the request body is being sent.
+    """
+
+    path: Path
+    content_type: str
+    filename: str
+
+    def __new__(
+        cls,
+        path: str | os.PathLike[str],
+        *,
+        content_type: str | None = None,
+        filename: str | None = None,
+    ) -> Self:
+        self = super().__new__(cls, os.fspath(path))
+        self.path = Path(path)
+        self.content_type = (
+            content_type or mimetypes.guess_type(self.path)[0] or "application/octet-stream"
+        )
+        self.filename = filename or self.path.name
+        return self
+
+    def data_uri_prefix(self) -> bytes:
+        return f"data:{self.content_type};filename={self.filename};base64,".encode()
+
+    def iter_base64(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        "Base64-encoded contents of the file, in chunks of (about) `chunk_size` bytes"
+        # read whole 3-byte groups, so chunks can be encoded independently
+        read_size = max(3, chunk_size // 4 * 3)
+        with open(self.path, "rb") as file:
+            if not os.fstat(file.fileno()).st_size:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    for offset in range(0, len(view), read_size):
+                        yield b64encode(view[offset : offset + read_size])
+
+
+class Base64Cache:
+    """
+    Base64 encodings of `LocalAttachment` files, for attachments sent over and over.
+
+    Files are recognized by path, device, inode, size and modification time, and encodings are
+    stored by content hash, so identical files share one entry. At most `max_bytes` of
+    encodings are kept (least recently used are evicted first); files whose encoding would
+    exceed `max_item_bytes` aren't cached at all.
+    """
+
+    def __init__(self, *, max_bytes: int = 64 << 20, max_item_bytes: int | None = None) -> None:
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_bytes // 4 if max_item_bytes is None else max_item_bytes
+        self._digests = dict[tuple, bytes]()
+        self._encoded = OrderedDict[bytes, bytes]()
+        self._size = 0
+
+    @staticmethod
+    def _file_key(attachment: LocalAttachment) -> tuple:
+        stat = attachment.path.stat()
+        return (str(attachment.path), stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def get(self, attachment: LocalAttachment) -> bytes | None:
+        if (digest := self._digests.get(self._file_key(attachment))) is None:
+            return None
+        if (encoded := self._encoded.get(digest)) is not None:
+            self._encoded.move_to_end(digest)
+        return encoded
+
+    def cacheable(self, attachment: LocalAttachment) -> bool:
+        return (attachment.path.stat().st_size + 2) // 3 * 4 <= self.max_item_bytes
+
+    def put(self, attachment: LocalAttachment, encoded: bytes) -> None:
+        if len(encoded) > self.max_item_bytes:
+            return
+        digest = sha256(encoded).digest()
+        self._digests[self._file_key(attachment)] = digest
+        if digest not in self._encoded:
+            self._encoded[digest] = encoded
+            self._size += len(encoded)
+        self._encoded.move_to_end(digest)
+        while self._size > self.max_bytes:
+            evicted, evicted_encoded = self._encoded.popitem(last=False)
+            self._size -= len(evicted_encoded)
+            for file_key in [k for k, d in self._digests.items() if d == evicted]:
+                del self._digests[file_key]
+
+    def encode(self, attachment: LocalAttachment) -> bytes:
+        "The base64 encoding of `attachment`, cached if it isn't already"
+        if (encoded := self.get(attachment)) is None:
+            encoded = b"".join(attachment.iter_base64())
+            self.put(attachment, encoded)
+        return encoded
+
+
+async def _stream_body(
+    parts: list[bytes],
+    attachments: list[LocalAttachment],
+    chunk_size: int,
+    cache: Base64Cache | None,
+) -> AsyncIterator[bytes | memoryview]:
+    for part, attachment in zip(parts, [*attachments, None]):
+        yield part
+        if attachment is None:
+            continue
+        # (the prefix contains the filename, which may need escaping)
+        yield json.dumps(attachment.data_uri_prefix().decode())[:-1].encode()
+        if cache is not None and (encoded := cache.get(attachment)) is not None:
+            yield memoryview(encoded)
+        elif cache is not None and cache.cacheable(attachment):
+            chunks = list[bytes]()
+            for chunk in attachment.iter_base64(chunk_size):
+                chunks.append(chunk)
+                yield chunk
+            cache.put(attachment, b"".join(chunks))
+        else:
+            for chunk in attachment.iter_base64(chunk_size):
+                yield chunk
+        yield b'"'
+
+
+async def send_streaming(
+    session: SignalCliRPCSession,
+    command: Send,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Base64Cache | None = None,
+) -> Empty:
+    """
+    Like `command.get(session)`, but with every `LocalAttachment` among `command.attachments`
+    inlined as a data URI. The request body is sent chunked and encoded from disk as it goes,
+    so memory use doesn't grow with the size of the attachments.
+
+    With a `cache`, encodings are looked up there first and sent as-is (without copying), and
+    encodings of files sent for the first time are added to it.
+    """
+    local, attachments = list[LocalAttachment](), list[str]()
+    for attachment in command.attachments:
+        if isinstance(attachment, LocalAttachment):
+            local.append(attachment)
+            # placeholder to split the serialized request at
+            attachment = f"\x00attachment-{len(local) - 1}\x00"
+        attachments.append(attachment)
+    request = RpcRequest(command._rpc_method_name, replace(command, attachments=tuple(attachments)))
+
+    body = json.dumps(request_json(request)).encode()
+    parts = list[bytes]()
+    for i in range(len(local)):
+        before, body = body.split(json.dumps(f"\x00attachment-{i}\x00").encode(), 1)
+        parts.append(before)
+    parts.append(body)
+
+    request = replace(request, params=command)
+    data = _stream_body(parts, local, chunk_size, cache)
+    return response_output(await session.rpc_request(request, data=data))
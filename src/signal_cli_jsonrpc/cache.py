@@ -0,0 +1,246 @@
+"""
+Read-through cache for the directory-style list commands (`ListContacts`, `ListGroups`,
+`ListIdentities`, `ListStickerPacks`), invalidated from the event stream and from mutations
+issued through it.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .commands import (
+    AddStickerPack,
+    Block,
+    JoinGroup,
+    ListContacts,
+    ListGroups,
+    ListIdentities,
+    ListStickerPacks,
+    QuitGroup,
+    RemoveContact,
+    Trust,
+    Unblock,
+    UpdateContact,
+    UpdateGroup,
+)
+from .conversation import GroupRevisions, group_infos
+from .session import Message, MessageError, MessageOrError, RpcCommand, SignalCliRPCSession
+from .store import DirectoryStore, decode_list_result
+from .types import SyncMessageType
+
+CACHEABLE_COMMANDS: tuple[type[RpcCommand], ...] = (
+    ListContacts,
+    ListGroups,
+    ListIdentities,
+    ListStickerPacks,
+)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    revalidation_errors: int = 0
+    "background revalidations which failed (see `RpcCache.last_revalidation_error`)"
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(frozen=True)
+class _Entry:
+    output: Any
+    expires_at: float
+
+
+class RpcCache:
+    """
+    Caches outputs of `CACHEABLE_COMMANDS`, keyed by the (frozen, hashable) command itself.
+
+    Entries expire after `ttl` seconds and at most `max_entries` are kept (least recently used
+    are evicted first). Feed every received event to `observe` so entries are dropped as soon as
+    the data they hold is known to be stale, and issue mutations through `rpc_output` so the
+    entries they affect are dropped too.
+
+    With a `store`, every result fetched is also persisted, and the first lookup of each command
+    after startup is served from the store straight away while it is revalidated against
+    signal-cli in the background (await `revalidated` to wait for that). If revalidating fails,
+    the stored result is dropped, so the next lookup fetches it again.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float = 300.0,
+        max_entries: int = 256,
+        store: DirectoryStore | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.store = store
+        self.stats = CacheStats()
+        self.last_revalidation_error: Exception | None = None
+        self._clock = clock
+        self._entries = OrderedDict[RpcCommand, _Entry]()
+        self._pending = dict[RpcCommand, asyncio.Future]()
+        self._group_revisions = GroupRevisions()
+        self._looked_up_in_store = set[RpcCommand]()
+        self._revalidations = set[asyncio.Task]()
+        # bumped on every invalidation, so fetches racing with one aren't stored afterwards
+        self._generation = 0
+
+    async def get[OutputT](
+        self, session: SignalCliRPCSession, command: RpcCommand[OutputT]
+    ) -> OutputT:
+        if not isinstance(command, CACHEABLE_COMMANDS):
+            raise TypeError(f"{type(command).__name__} is not cacheable")
+
+        match self._entries.get(command):
+            case _Entry(output, expires_at) if expires_at > self._clock():
+                self._entries.move_to_end(command)
+                self.stats.hits += 1
+                return output
+            case _Entry():
+                del self._entries[command]
+
+        self.stats.misses += 1
+        if self.store is not None and command not in self._looked_up_in_store:
+            self._looked_up_in_store.add(command)
+            if stored := self.store.load(command):
+                output = decode_list_result(command, stored.result)
+                entry = self._store(command, output)
+                revalidation = asyncio.create_task(self._load(session, command))
+                self._revalidations.add(revalidation)
+                revalidation.add_done_callback(
+                    lambda revalidation: self._revalidated(command, entry, revalidation)
+                )
+                return output
+        return await self._load(session, command)
+
+    async def revalidated(self) -> None:
+        "Wait for background revalidations of results served from `store` to finish"
+        await asyncio.gather(*self._revalidations, return_exceptions=True)
+
+    def _revalidated(self, command: RpcCommand, entry: _Entry, revalidation: asyncio.Task) -> None:
+        self._revalidations.discard(revalidation)
+        if revalidation.cancelled() or not (error := revalidation.exception()):
+            return
+        self.stats.revalidation_errors += 1
+        self.last_revalidation_error = error
+        # (unless it was replaced in the meantime)
+        if self._entries.get(command) is entry:
+            del self._entries[command]
+
+    async def _load(self, session: SignalCliRPCSession, command: RpcCommand) -> Any:
+        if pending := self._pending.get(command):
+            return await asyncio.shield(pending)
+
+        generation = self._generation
+        pending = self._pending[command] = asyncio.ensure_future(self._fetch(session, command))
+        try:
+            output = await asyncio.shield(pending)
+        finally:
+            del self._pending[command]
+        if generation == self._generation:
+            self._store(command, output)
+        return output
+
+    async def _fetch(self, session: SignalCliRPCSession, command: RpcCommand) -> Any:
+        if self.store is None:
+            return await session.rpc_output(command)
+        result = await session.rpc_result_json(command)
+        self.store.save(command, result)
+        return decode_list_result(command, result)
+
+    async def rpc_output[OutputT](
+        self, session: SignalCliRPCSession, command: RpcCommand[OutputT]
+    ) -> OutputT:
+        """Like `SignalCliRPCSession.rpc_output`, but served from / invalidating this cache."""
+        if isinstance(command, CACHEABLE_COMMANDS):
+            return await self.get(session, command)
+        try:
+            return await session.rpc_output(command)
+        finally:
+            self.invalidate_for(command)
+
+    def _store(self, command: RpcCommand, output: Any) -> _Entry:
+        entry = self._entries[command] = _Entry(output, self._clock() + self.ttl)
+        self._entries.move_to_end(command)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+        return entry
+
+    def invalidate(
+        self, command_type: type[RpcCommand], *, group_ids: tuple[str, ...] = ()
+    ) -> None:
+        """
+        Drop cached entries of `command_type`. For `ListGroups`, passing `group_ids` limits this
+        to entries which (may) include one of those groups.
+        """
+        self._generation += 1
+        for command in [c for c in self._entries if type(c) is command_type]:
+            match command:
+                case ListGroups(group_ids=listed) if group_ids and listed:
+                    if not set(listed) & set(group_ids):
+                        continue
+            del self._entries[command]
+            self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        self._generation += 1
+        self.stats.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def invalidate_for(self, command: RpcCommand) -> None:
+        """Drop entries made stale by a mutation `command` issued to signal-cli."""
+        match command:
+            case (
+                Block(recipients=recipients, group_ids=group_ids)
+                | Unblock(recipients=recipients, group_ids=group_ids)
+            ):
+                if recipients:
+                    self.invalidate(ListContacts)
+                if group_ids:
+                    self.invalidate(ListGroups, group_ids=group_ids)
+            case UpdateContact():
+                self.invalidate(ListContacts)
+            case RemoveContact(forget=forget):
+                self.invalidate(ListContacts)
+                if forget:
+                    self.invalidate(ListIdentities)
+            case UpdateGroup(group_id=str(group_id)) | QuitGroup(group_id=group_id):
+                self.invalidate(ListGroups, group_ids=(group_id,))
+            case UpdateGroup() | JoinGroup():
+                self.invalidate(ListGroups)
+            case Trust():
+                self.invalidate(ListIdentities)
+            case AddStickerPack():
+                self.invalidate(ListStickerPacks)
+
+    def observe(self, event: MessageOrError) -> None:
+        """Drop entries made stale by an event received from signal-cli."""
+        match event:
+            case MessageError(error=error) if error and "Identity" in (error.type or ""):
+                self.invalidate(ListIdentities)
+            case Message(envelope=envelope) if envelope:
+                for group_id, group_info in group_infos(envelope):
+                    if self._group_revisions.observe(group_info):
+                        self.invalidate(ListGroups, group_ids=(group_id,))
+                if sync := envelope.sync_message:
+                    match sync.type:
+                        case SyncMessageType.CONTACTS_SYNC:
+                            self.invalidate(ListContacts)
+                        case SyncMessageType.GROUPS_SYNC:
+                            self.invalidate(ListGroups)
+                    if sync.blocked_numbers:
+                        self.invalidate(ListContacts)
+                    if blocked_group_ids := tuple(filter(None, sync.blocked_group_ids)):
+                        self.invalidate(ListGroups, group_ids=blocked_group_ids)
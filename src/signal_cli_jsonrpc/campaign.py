@@ -0,0 +1,314 @@
+"""
+Sending one message to very many recipients in paced, adaptively sized chunks, with each
+recipient's outcome checkpointed to disk so an interrupted campaign resumes where it stopped.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Iterable, Self
+
+from aiohttp import ClientError
+
+from .attachments import Base64Cache, LocalAttachment
+from .commands import Send
+from .outbox import is_transient
+from .session import RpcResponseError, SignalCliRPCSession, from_json
+from .types import SendMessageResult
+
+_FAILED_TYPES = {
+    SendMessageResult.Type.UNREGISTERED_FAILURE,
+    SendMessageResult.Type.IDENTITY_FAILURE,
+    SendMessageResult.Type.INVALID_PRE_KEY_FAILURE,
+}
+_TRANSPORT_ERRORS = (ClientError, TimeoutError)
+"errors after which a request may or may not have reached signal-cli"
+
+
+@dataclass(frozen=True)
+class CampaignOutcome:
+    recipient: str
+    result: SendMessageResult | None
+    "signal-cli's result for the recipient, if there was one"
+    error: Exception | None = None
+    "the error of the request, if that failed for this recipient alone or in transport"
+
+    @property
+    def ok(self) -> bool:
+        return self.result is not None and self.result.type == SendMessageResult.Type.SUCCESS
+
+
+@dataclass(frozen=True)
+class CampaignProgress:
+    total: int
+    sent: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    "seconds since this run started"
+    done_this_run: int = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.sent - self.failed
+
+    @property
+    def rate(self) -> float:
+        "recipients completed per second in this run"
+        return self.done_this_run / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        "estimated seconds until all recipients are done"
+        return self.remaining / self.rate if self.rate else None
+
+
+class Campaign:
+    """
+    Sends `message` (a `Send` without recipients) to each of `recipients`, several recipients
+    per `Send`. Every recipient's outcome is recorded under `name` in the sqlite database at
+    `path`, so running a campaign of the same name again only sends to recipients who are still
+    pending.
+
+    Chunks start at `chunk_size` recipients, grow while they succeed and halve when signal-cli
+    reports rate limiting or fails a request (down to single recipients, whose failed requests
+    are recorded as their outcome). A request that fails in transport (e.g. times out) may still
+    have been sent, so isn't sent again: its recipients are recorded as failed with the error.
+    After rate limiting or failed requests, sending pauses for as long as signal-cli asks, or for
+    an exponentially increasing `backoff`. At most `max_rate` recipients are sent to
+    per second, if given. Recipients whose message couldn't be delivered for a transient reason
+    are retried up to `max_attempts` times.
+
+    `LocalAttachment`s of `message` are base64-encoded once (or taken from `cache`) and inlined
+    into every chunk as data URIs.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        name: str,
+        message: Send,
+        recipients: Iterable[str],
+        *,
+        chunk_size: int = 50,
+        max_chunk_size: int = 500,
+        max_rate: float | None = None,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        max_attempts: int = 5,
+        cache: Base64Cache | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert not (message.recipients or message.group_ids or message.usernames), (
+            "campaign message must not have recipients of its own"
+        )
+        self.name = name
+        self.message = message
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.max_rate = max_rate
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.cache = cache
+        self.clock = clock
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS campaign_recipients ("
+            " campaign TEXT NOT NULL, position INTEGER NOT NULL, recipient TEXT NOT NULL,"
+            " state TEXT NOT NULL, attempts INTEGER NOT NULL, outcome TEXT,"
+            " PRIMARY KEY (campaign, recipient))"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS campaign_recipients_pending"
+            " ON campaign_recipients (campaign, state, position)"
+        )
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO campaign_recipients"
+                " (campaign, position, recipient, state, attempts) VALUES (?, ?, ?, 'pending', 0)",
+                ((name, position, recipient) for position, recipient in enumerate(recipients)),
+            )
+
+    def progress(self) -> CampaignProgress:
+        counts = dict(
+            self._db.execute(
+                "SELECT state, COUNT(*) FROM campaign_recipients WHERE campaign = ? GROUP BY state",
+                (self.name,),
+            )
+        )
+        return CampaignProgress(
+            total=sum(counts.values()),
+            sent=counts.get("sent", 0),
+            failed=counts.get("failed", 0),
+        )
+
+    def _prepared_message(self) -> Send:
+        attachments = list[str]()
+        for attachment in self.message.attachments:
+            if isinstance(attachment, LocalAttachment):
+                encoded = (
+                    self.cache.encode(attachment)
+                    if self.cache is not None
+                    else b"".join(attachment.iter_base64())
+                )
+                attachment = (attachment.data_uri_prefix() + encoded).decode()
+            attachments.append(attachment)
+        return replace(self.message, attachments=tuple(attachments))
+
+    def _pending(self, limit: int) -> list[tuple[str, int]]:
+        return self._db.execute(
+            "SELECT recipient, attempts FROM campaign_recipients"
+            " WHERE campaign = ? AND state = 'pending' ORDER BY position LIMIT ?",
+            (self.name, limit),
+        ).fetchall()
+
+    async def run(
+        self,
+        session: SignalCliRPCSession,
+        *,
+        on_outcome: Callable[[CampaignOutcome], None] | None = None,
+        on_progress: Callable[[CampaignProgress], None] | None = None,
+    ) -> CampaignProgress:
+        """
+        Send to all pending recipients, passing each final outcome to `on_outcome` and progress
+        after each chunk to `on_progress`. Returns the final progress.
+        """
+        message = self._prepared_message()
+        started = self.clock()
+        progress = self.progress()
+        chunk_size = self.chunk_size
+        backoff = self.backoff
+        next_send = started
+
+        while chunk := self._pending(chunk_size):
+            if (delay := next_send - self.clock()) > 0:
+                await asyncio.sleep(delay)
+            recipients = tuple(recipient for recipient, _ in chunk)
+            if self.max_rate:
+                next_send = max(next_send, self.clock()) + len(chunk) / self.max_rate
+
+            pause = None
+            try:
+                result = await session.rpc_result_json(replace(message, recipients=recipients))
+            except RpcResponseError as e:
+                pause = backoff
+                if len(chunk) > 1:
+                    # signal-cli rejected the request, so retry in smaller chunks to isolate
+                    # recipients it fails for
+                    chunk_size = max(1, len(chunk) // 2)
+                    outcomes = dict[str, CampaignOutcome]()
+                else:
+                    outcomes = {recipients[0]: CampaignOutcome(recipients[0], None, e)}
+            except _TRANSPORT_ERRORS as e:
+                # the message may have been sent anyway, so resending could duplicate it
+                chunk_size = max(1, len(chunk) // 2)
+                pause = backoff
+                outcomes = {
+                    recipient: CampaignOutcome(recipient, None, e) for recipient in recipients
+                }
+            else:
+                outcomes = self._outcomes(recipients, result.get("results") or [])
+                for recipient in recipients:
+                    # recipients signal-cli returned no result for are retried
+                    outcomes.setdefault(recipient, CampaignOutcome(recipient, None))
+                retry_after = [
+                    outcome.result.retry_after_seconds or 0
+                    for outcome in outcomes.values()
+                    if outcome.result
+                    and outcome.result.type == SendMessageResult.Type.RATE_LIMIT_FAILURE
+                ]
+                if retry_after:
+                    chunk_size = max(1, len(chunk) // 2)
+                    pause = max(backoff, *retry_after)
+                else:
+                    chunk_size = min(self.max_chunk_size, max(chunk_size, len(chunk) * 5 // 4 + 1))
+                    backoff = self.backoff
+
+            if pause is not None:
+                next_send = max(next_send, self.clock() + pause)
+                backoff = min(self.max_backoff, backoff * 2)
+
+            updates, final = self._updates(chunk, outcomes)
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "UPDATE campaign_recipients SET state = ?, attempts = ?, outcome = ?"
+                    " WHERE campaign = ? AND recipient = ?",
+                    updates,
+                )
+
+            sent = sum(outcome.ok for outcome in final)
+            progress = replace(
+                progress,
+                sent=progress.sent + sent,
+                failed=progress.failed + len(final) - sent,
+                done_this_run=progress.done_this_run + len(final),
+                elapsed=self.clock() - started,
+            )
+            if on_outcome:
+                for outcome in final:
+                    on_outcome(outcome)
+            if on_progress:
+                on_progress(progress)
+
+        return progress
+
+    @staticmethod
+    def _outcomes(
+        recipients: tuple[str, ...], results: list[dict[str, Any]]
+    ) -> dict[str, CampaignOutcome]:
+        outcomes = dict[str, CampaignOutcome]()
+        for i, result_json in enumerate(results):
+            result = from_json(SendMessageResult, result_json)
+            address = result.recipient_address
+            identifiers = {address.number, address.uuid, address.username} if address else set()
+            # results are in the order of the recipients, but match them up in case they're not
+            if i < len(recipients) and recipients[i] in identifiers:
+                recipient = recipients[i]
+            elif not (recipient := next((r for r in recipients if r in identifiers), None)):
+                continue
+            outcomes[recipient] = CampaignOutcome(recipient, result)
+        return outcomes
+
+    def _updates(
+        self, chunk: list[tuple[str, int]], outcomes: dict[str, CampaignOutcome]
+    ) -> tuple[list[tuple], list[CampaignOutcome]]:
+        updates = list[tuple]()
+        final = list[CampaignOutcome]()
+        for recipient, attempts in chunk:
+            outcome = outcomes.get(recipient)
+            if outcome is None:
+                # not attempted: the chunk's request failed, and is retried in smaller chunks
+                continue
+            attempts += 1
+            if outcome.ok:
+                state = "sent"
+            elif (
+                attempts >= self.max_attempts
+                or outcome.result is not None
+                and outcome.result.type in _FAILED_TYPES
+                or isinstance(outcome.error, _TRANSPORT_ERRORS)
+                or isinstance(outcome.error, RpcResponseError)
+                and not is_transient(outcome.error)
+            ):
+                state = "failed"
+            else:
+                state = "pending"
+            outcome_repr = repr(outcome.result or outcome.error)
+            updates.append((state, attempts, outcome_repr, self.name, recipient))
+            if state != "pending":
+                final.append(outcome)
+        return updates, final
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,180 @@
+"""
+Merging of short plain-text `Send`s to the same conversation, sent in quick succession, into one
+`Send`.
+"""
+
+import asyncio
+from dataclasses import dataclass, field, replace
+from typing import Any, Iterable, Self
+
+from .commands import Send
+from .outputs import Empty
+from .session import SignalCliRPCSession
+
+
+def utf16_len(text: str) -> int:
+    "Length of `text` in UTF-16 code units, the unit of mention and text style offsets"
+    return len(text.encode("utf-16-le")) // 2
+
+
+def is_plain_text(send: Send) -> bool:
+    "Whether `send` has nothing but text (with mentions and text styles)"
+    return send.message is not None and send == replace(
+        _target(send), message=send.message, mentions=send.mentions, text_styles=send.text_styles
+    )
+
+
+def _target(send: Send) -> Send:
+    # the recipients and sending options of `send`, without any content
+    return Send(
+        recipients=send.recipients,
+        group_ids=send.group_ids,
+        usernames=send.usernames,
+        note_to_self=send.note_to_self,
+        notify_self=send.notify_self,
+    )
+
+
+def _shifted(ranges: tuple[str, ...], offset: int) -> Iterable[str]:
+    # `start:length:...` ranges (mentions and text styles)
+    for range in ranges:
+        start, rest = range.split(":", 1)
+        yield f"{int(start) + offset}:{rest}"
+
+
+def merge_sends(sends: Iterable[Send], separator: str = "\n") -> Send:
+    "Merge plain-text `sends` to the same recipients into one, their messages joined by `separator`"
+    sends = list(sends)
+    assert sends and all(is_plain_text(send) for send in sends)
+    assert len({_target(send) for send in sends}) == 1, "sends must have the same recipients"
+    message, mentions, text_styles = "", list[str](), list[str]()
+    for i, send in enumerate(sends):
+        if i:
+            message += separator
+        offset = utf16_len(message)
+        message += send.message or ""
+        mentions.extend(_shifted(send.mentions, offset))
+        text_styles.extend(_shifted(send.text_styles, offset))
+    return replace(
+        sends[0], message=message, mentions=tuple(mentions), text_styles=tuple(text_styles)
+    )
+
+
+@dataclass
+class CoalesceStats:
+    sends: int = 0
+    "sends submitted"
+    requests: int = 0
+    "`Send` requests made for them"
+
+
+@dataclass
+class _Buffer:
+    sends: list[Send] = field(default_factory=list)
+    futures: list[asyncio.Future[Empty]] = field(default_factory=list)
+    length: int = 0
+    timer: asyncio.TimerHandle | None = None
+
+
+class SendCoalescer:
+    """
+    Buffers plain-text sends (see `is_plain_text`) per conversation for `window` seconds after
+    the first one, then sends them as one `Send` (see `merge_sends`). A buffer is sent early when
+    another send wouldn't fit into `max_length` UTF-16 code units.
+
+    Other sends (with attachments, quotes, edits, ...) are sent unchanged, after the buffer of
+    their conversation. Sends to the same recipients are made one after the other, in the order
+    they were submitted.
+    """
+
+    def __init__(
+        self,
+        session: SignalCliRPCSession,
+        *,
+        window: float = 0.3,
+        max_length: int = 2000,
+        separator: str = "\n",
+    ) -> None:
+        self.session = session
+        self.window = window
+        self.max_length = max_length
+        self.separator = separator
+        self.stats = CoalesceStats()
+        self._buffers = dict[Send, _Buffer]()
+        self._tails = dict[Send, asyncio.Task[None]]()
+        "last request to each conversation"
+
+    def submit(self, send: Send) -> asyncio.Future[Empty]:
+        "Queue `send`, returning a future of the output of the request it is sent with"
+        self.stats.sends += 1
+        future = asyncio.get_running_loop().create_future()
+        key = _target(send)
+        if not is_plain_text(send):
+            self._flush(key)
+            self._request(key, send, [future])
+            return future
+
+        length = utf16_len(send.message or "")
+        if (buffer := self._buffers.get(key)) and (
+            buffer.length + utf16_len(self.separator) + length > self.max_length
+        ):
+            self._flush(key)
+        if not (buffer := self._buffers.get(key)):
+            buffer = self._buffers[key] = _Buffer(length=-utf16_len(self.separator))
+            buffer.timer = asyncio.get_running_loop().call_later(self.window, self._flush, key)
+        buffer.sends.append(send)
+        buffer.futures.append(future)
+        buffer.length += utf16_len(self.separator) + length
+        return future
+
+    async def send(self, send: Send) -> Empty:
+        "Queue `send` and wait until it has been sent"
+        return await self.submit(send)
+
+    def _flush(self, key: Send) -> None:
+        if not (buffer := self._buffers.pop(key, None)):
+            return
+        if buffer.timer:
+            buffer.timer.cancel()
+        send = (
+            buffer.sends[0] if len(buffer.sends) == 1 else merge_sends(buffer.sends, self.separator)
+        )
+        self._request(key, send, buffer.futures)
+
+    def _request(self, key: Send, send: Send, futures: list[asyncio.Future[Empty]]) -> None:
+        previous = self._tails.get(key)
+        task = self._tails[key] = asyncio.create_task(self._send(previous, send, futures))
+        task.add_done_callback(lambda _: self._tails.get(key) is task and self._tails.pop(key))
+
+    async def _send(
+        self,
+        previous: asyncio.Task[None] | None,
+        send: Send,
+        futures: list[asyncio.Future[Empty]],
+    ) -> None:
+        if previous:
+            await asyncio.wait([previous])
+        self.stats.requests += 1
+        try:
+            output = await self.session.rpc_output(send)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in futures:
+                if not future.done():
+                    future.set_result(output)
+
+    async def flush(self) -> None:
+        "Send all buffered sends now, and wait until all requests are done"
+        for key in list(self._buffers):
+            self._flush(key)
+        if self._tails:
+            await asyncio.wait(list(self._tails.values()))
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.flush()
@@ -0,0 +1,76 @@
+"""
+JSON encoding and decoding for the session, using orjson or msgspec when installed (see the
+`fast` extra) and the standard library's `json` otherwise.
+"""
+
+import json
+from typing import Any, Protocol
+
+
+class JsonCodec(Protocol):
+    name: str
+
+    def dumps(self, obj: Any, /) -> bytes: ...
+
+    def loads(self, data: bytes | str, /) -> Any: ...
+
+
+class StdlibCodec:
+    name = "json"
+
+    def dumps(self, obj: Any, /) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def loads(self, data: bytes | str, /) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj: Any, /) -> bytes:
+        return self._orjson.dumps(obj)
+
+    def loads(self, data: bytes | str, /) -> Any:
+        return self._orjson.loads(data)
+
+
+class MsgspecCodec:
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any, /) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: bytes | str, /) -> Any:
+        return self._decoder.decode(data)
+
+
+CODECS: dict[str, type[JsonCodec]] = {
+    codec.name: codec for codec in (OrjsonCodec, MsgspecCodec, StdlibCodec)
+}
+
+
+def get_codec(name: str | None = None) -> JsonCodec:
+    """
+    The codec called `name` (one of `CODECS`), or if `name` isn't given, the first of them
+    whose library is installed.
+    """
+    if name is not None:
+        return CODECS[name]()
+    for codec in (OrjsonCodec, MsgspecCodec):
+        try:
+            return codec()
+        except ImportError:
+            pass
+    return StdlibCodec()
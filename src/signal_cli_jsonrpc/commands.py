@@ -347,7 +347,7 @@ class Receive(RpcCommand[list[MessageOrError]]):
     *[generated from [Java source](https://github.com/AsamK/signal-cli/blob/f2005593ecefd37c7e1666c2dc0c71b259271af0/src/main/java/org/asamk/signal/commands/ReceiveCommand.java)]*
     """
 
-    timeout: str = 3.0
+    timeout: float = 3.0
     "Number of seconds to wait for new messages (negative values disable timeout)"
     max_messages: int = -1
     "Maximum number of messages to receive, before returning."
@@ -0,0 +1,105 @@
+"""
+Conversations (a group, or a one-to-one chat) as keys for per-conversation state, and what
+conversations envelopes belong to.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator
+
+from .commands import Send, SendTyping
+from .types import DataMessage, GroupInfo, MessageEnvelope, StoryMessage
+
+
+@dataclass(frozen=True)
+class Conversation:
+    group_id: str | None = None
+    recipient: str | None = None
+    "number, uuid or username of the other participant of a one-to-one chat"
+
+    def __post_init__(self) -> None:
+        assert (self.group_id is None) != (self.recipient is None), (
+            "conversation needs either a group id or a recipient"
+        )
+
+    def typing(self, *, stop: bool = False) -> SendTyping:
+        if self.group_id is not None:
+            return SendTyping(group_ids=(self.group_id,), stop=stop)
+        assert self.recipient is not None
+        return SendTyping(recipients=(self.recipient,), stop=stop)
+
+
+def send_conversations(send: Send) -> Iterator[Conversation]:
+    "The conversations `send` goes to"
+    for group_id in send.group_ids:
+        yield Conversation(group_id=group_id)
+    for recipient in (*send.recipients, *send.usernames):
+        yield Conversation(recipient=recipient)
+
+
+def data_messages(envelope: MessageEnvelope) -> Iterator[DataMessage]:
+    "The data messages of `envelope`: received, edited, or sent by another of our devices"
+    sync = envelope.sync_message
+    for message in (
+        envelope.data_message,
+        envelope.edit_message and envelope.edit_message.data_message,
+        sync and sync.sent_message,
+    ):
+        if isinstance(message, DataMessage):
+            yield message
+
+
+def group_infos(envelope: MessageEnvelope) -> Iterator[tuple[str, GroupInfo]]:
+    "The group infos (with their group ids) of the data messages of `envelope`"
+    for message in data_messages(envelope):
+        if (group_info := message.group_info) and (group_id := group_info.group_id):
+            yield group_id, group_info
+
+
+class GroupRevisions:
+    "The latest revision seen of each group, for telling when what is known of a group is stale"
+
+    def __init__(self) -> None:
+        self._revisions = dict[str, int]()
+
+    def observe(self, group_info: GroupInfo) -> bool:
+        """
+        Record the revision of `group_info`, returning whether it shows that the group changed:
+        it's an update, or newer than the revision seen before
+        """
+        assert group_info.group_id, "group info has no group id"
+        known_revision = self._revisions.get(group_info.group_id)
+        self._revisions[group_info.group_id] = max(group_info.revision, known_revision or 0)
+        return group_info.type == "UPDATE" or (
+            known_revision is not None and group_info.revision > known_revision
+        )
+
+    def forget(self, group_id: str) -> None:
+        self._revisions.pop(group_id, None)
+
+
+def envelope_group_id(envelope: MessageEnvelope) -> str | None:
+    "The group `envelope`'s message or story was sent in, if any"
+    for group_id, _ in group_infos(envelope):
+        return group_id
+    sync = envelope.sync_message
+    for story_message in (envelope.story_message, sync and sync.sent_story_message):
+        if isinstance(story_message, StoryMessage) and story_message.group_id:
+            return story_message.group_id
+    return None
+
+
+def envelope_conversation(envelope: MessageEnvelope) -> Conversation | None:
+    """
+    The conversation `envelope` belongs to: its group, or else the other participant, which for
+    messages sent by another of our devices is the recipient
+    """
+    typing = envelope.typing_message
+    if group_id := envelope_group_id(envelope) or (typing and typing.group_id):
+        return Conversation(group_id=group_id)
+    sync = envelope.sync_message
+    for sent in (sync and sync.sent_message, sync and sync.sent_story_message):
+        if sent and (recipient := sent.destination_uuid or sent.destination_number):
+            return Conversation(recipient=recipient)
+    if recipient := envelope.source_uuid or envelope.source_number:
+        return Conversation(recipient=recipient)
+    return None
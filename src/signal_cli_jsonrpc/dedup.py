@@ -0,0 +1,149 @@
+"""
+Dropping of envelopes which were already received, e.g. again after the event stream reconnected,
+or both from the event stream and from `Receive`.
+"""
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Callable
+
+from .session import Message, MessageOrError
+
+type EventKey = tuple[str, str | None, int | None, int]
+"(account, source uuid or number, source device, timestamp)"
+
+
+def event_key(event: MessageOrError) -> EventKey | None:
+    "The key identifying `event`'s envelope, or `None` for events without an envelope"
+    match event:
+        case Message(account, envelope) if envelope:
+            source = envelope.source_uuid or envelope.source_number
+            return (account, source, envelope.source_device, envelope.timestamp)
+        case _:
+            return None
+
+
+class BloomFilter:
+    """
+    Set of `bytes` (given by their `positions`) which may report items that were never added as
+    contained (with a probability of about `error_rate` once `capacity` items have been added),
+    in a fixed amount of memory.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        "number of bits"
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        "number of items added"
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item: bytes) -> list[int]:
+        """
+        The bits representing `item`, which are the same in filters of the same capacity and
+        error rate, so they only need to be computed once to check several filters
+        """
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8]), int.from_bytes(digest[8:]) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, positions: list[int]) -> None:
+        for position in positions:
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains(self, positions: list[int]) -> bool:
+        return all(self._bits[p >> 3] & 1 << (p & 7) for p in positions)
+
+    @property
+    def false_positive_rate(self) -> float:
+        "Estimated probability that an item which was never added is reported as contained"
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+@dataclass
+class DedupStats:
+    events: int = 0
+    "events checked"
+    duplicates: int = 0
+    "events dropped because they were in the exact window"
+    probable_duplicates: int = 0
+    "events dropped because only the Bloom filter had them, which may be false drops"
+
+
+class EventDeduplicator:
+    """
+    Remembers the keys (see `event_key`) of envelopes seen in the last `window` seconds exactly
+    (but at most `max_exact` of them), and older ones in Bloom filters of `bloom_capacity` keys
+    each, so memory use stays constant however many events are received.
+
+    Envelopes are dropped as duplicates if their key is remembered. The Bloom filters may
+    (rarely) remember keys that were never seen, dropping new envelopes; `stats` counts these
+    drops separately, and `false_drop_rate` estimates their rate. A `bloom_capacity` of 0 only
+    remembers the exact window.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: float = 600.0,
+        max_exact: int = 100_000,
+        bloom_capacity: int = 1_000_000,
+        bloom_error_rate: float = 1e-6,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self.max_exact = max_exact
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.clock = clock
+        self.stats = DedupStats()
+        self._exact = OrderedDict[EventKey, float]()
+        # the current and the previous generation: keys of the previous `bloom_capacity` to
+        # `2 * bloom_capacity` events are remembered
+        self._blooms = list[BloomFilter]()
+
+    def is_duplicate(self, event: MessageOrError) -> bool:
+        "Whether `event` was seen before, remembering it if it wasn't"
+        if (key := event_key(event)) is None:
+            return False
+        self.stats.events += 1
+        now = self.clock()
+        while self._exact and (
+            len(self._exact) >= self.max_exact
+            or next(iter(self._exact.values())) < now - self.window
+        ):
+            self._exact.popitem(last=False)
+
+        if key in self._exact:
+            self.stats.duplicates += 1
+            return True
+        positions = self._blooms[0].positions(repr(key).encode()) if self._blooms else []
+        if any(bloom.contains(positions) for bloom in self._blooms):
+            self.stats.probable_duplicates += 1
+            return True
+
+        self._exact[key] = now
+        if self.bloom_capacity:
+            if not self._blooms or self._blooms[-1].count >= self.bloom_capacity:
+                self._blooms = [
+                    *self._blooms[-1:],
+                    BloomFilter(self.bloom_capacity, self.bloom_error_rate),
+                ]
+            bloom = self._blooms[-1]
+            bloom.add(positions or bloom.positions(repr(key).encode()))
+        return False
+
+    @property
+    def false_drop_rate(self) -> float:
+        "Estimated probability that a new envelope is dropped as a duplicate"
+        return 1 - math.prod(1 - bloom.false_positive_rate for bloom in self._blooms)
+
+    async def filter(self, events: AsyncIterable[MessageOrError]) -> AsyncIterator[MessageOrError]:
+        "`events` without duplicates"
+        async for event in events:
+            if not self.is_duplicate(event):
+                yield event
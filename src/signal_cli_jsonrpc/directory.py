@@ -0,0 +1,276 @@
+"""
+In-memory directory of contacts and groups with hash indexes, built from `ListContacts` /
+`ListGroups` outputs and kept up to date incrementally.
+"""
+
+from collections import defaultdict
+from itertools import chain
+from typing import Iterable, Self
+
+from .commands import ListContacts, ListGroups
+from .conversation import GroupRevisions, group_infos
+from .outputs import Group, GroupMember
+from .session import Message, MessageOrError, SignalCliRPCSession
+from .snapshot import SnapshotDiff
+from .types import Contact, SyncMessageType
+
+
+def _contact_key(contact: Contact) -> str | None:
+    return contact.uuid or contact.number or contact.username
+
+
+def _member_keys(member: GroupMember) -> tuple[str, ...]:
+    return tuple(filter(None, (member.uuid, member.number)))
+
+
+class Directory:
+    """
+    Contacts indexed by uuid, number and username; groups indexed by id, with reverse indexes
+    from members (by uuid or number) to the groups they belong to, administer or are banned from.
+
+    All lookups are dict/set lookups. Updates only touch the index entries of the contacts or
+    groups that actually changed, so re-syncing a large account is proportional to the change.
+
+    Feed received events to `observe` and call `refresh` to re-list whatever they marked stale.
+    """
+
+    def __init__(
+        self,
+        contacts: Iterable[Contact] = (),
+        groups: Iterable[Group] = (),
+        *,
+        contacts_command: ListContacts = ListContacts(),
+    ) -> None:
+        self.contacts_command = contacts_command
+        self._contacts = dict[str, Contact]()
+        self._by_uuid = dict[str, Contact]()
+        self._by_number = dict[str, Contact]()
+        self._by_username = dict[str, Contact]()
+
+        self._groups = dict[str, Group]()
+        self._member_groups = defaultdict[str, set[str]](set)
+        self._admin_groups = defaultdict[str, set[str]](set)
+        self._banned_groups = defaultdict[str, set[str]](set)
+        self._admins = dict[str, frozenset[str]]()
+        self._banned = dict[str, frozenset[str]]()
+
+        self._group_revisions = GroupRevisions()
+        self._stale_contacts = False
+        self._stale_recipients = set[str]()
+        self._stale_groups = False
+        self._stale_group_ids = set[str]()
+
+        for contact in contacts:
+            self.upsert_contact(contact)
+        for group in groups:
+            self.upsert_group(group)
+
+    @classmethod
+    async def load(
+        cls, session: SignalCliRPCSession, *, contacts_command: ListContacts = ListContacts()
+    ) -> Self:
+        return cls(
+            await contacts_command.get(session),
+            await ListGroups().get(session),
+            contacts_command=contacts_command,
+        )
+
+    # -- lookups --
+
+    def __len__(self) -> int:
+        return len(self._contacts) + len(self._groups)
+
+    @property
+    def contacts(self) -> Iterable[Contact]:
+        return self._contacts.values()
+
+    @property
+    def groups(self) -> Iterable[Group]:
+        return self._groups.values()
+
+    def contact_by_uuid(self, uuid: str) -> Contact | None:
+        return self._by_uuid.get(uuid)
+
+    def contact_by_number(self, number: str) -> Contact | None:
+        return self._by_number.get(number)
+
+    def contact_by_username(self, username: str) -> Contact | None:
+        return self._by_username.get(username)
+
+    def resolve(self, recipient: str) -> Contact | None:
+        "Look up a contact by whichever of uuid, number or username `recipient` is"
+        return (
+            self._by_uuid.get(recipient)
+            or self._by_number.get(recipient)
+            or self._by_username.get(recipient)
+        )
+
+    def group(self, group_id: str) -> Group | None:
+        return self._groups.get(group_id)
+
+    def members(self, group_id: str) -> list[GroupMember]:
+        return group.members if (group := self._groups.get(group_id)) else []
+
+    def groups_of(self, member: str) -> set[str]:
+        "Ids of groups which `member` (uuid or number) is a member of"
+        return self._member_groups.get(member, set())
+
+    def groups_administered_by(self, member: str) -> set[str]:
+        return self._admin_groups.get(member, set())
+
+    def groups_banning(self, member: str) -> set[str]:
+        return self._banned_groups.get(member, set())
+
+    def is_member(self, group_id: str, member: str) -> bool:
+        return group_id in self.groups_of(member)
+
+    def is_admin(self, group_id: str, member: str) -> bool:
+        return member in self._admins.get(group_id, ())
+
+    def is_banned(self, group_id: str, member: str) -> bool:
+        return member in self._banned.get(group_id, ())
+
+    # -- incremental updates --
+
+    def upsert_contact(self, contact: Contact) -> None:
+        if (key := _contact_key(contact)) is None:
+            return
+        if (old := self._contacts.get(key)) is not None:
+            if old == contact:
+                return
+            self._unindex_contact(old)
+        self._contacts[key] = contact
+        for index, value in (
+            (self._by_uuid, contact.uuid),
+            (self._by_number, contact.number),
+            (self._by_username, contact.username),
+        ):
+            if value:
+                index[value] = contact
+
+    def remove_contact(self, contact: Contact) -> None:
+        if (key := _contact_key(contact)) and (old := self._contacts.pop(key, None)):
+            self._unindex_contact(old)
+
+    def _unindex_contact(self, contact: Contact) -> None:
+        for index, value in (
+            (self._by_uuid, contact.uuid),
+            (self._by_number, contact.number),
+            (self._by_username, contact.username),
+        ):
+            if value and index.get(value) is contact:
+                del index[value]
+
+    def upsert_group(self, group: Group) -> None:
+        old = self._groups.get(group.id)
+        if old == group:
+            return
+        self._groups[group.id] = group
+        self._reindex_group(group.id, old, group)
+
+    def remove_group(self, group_id: str) -> None:
+        if old := self._groups.pop(group_id, None):
+            self._reindex_group(group_id, old, None)
+        self._group_revisions.forget(group_id)
+
+    def _reindex_group(self, group_id: str, old: Group | None, new: Group | None) -> None:
+        for attr, reverse_index, forward_index in (
+            ("members", self._member_groups, None),
+            ("admins", self._admin_groups, self._admins),
+            ("banned", self._banned_groups, self._banned),
+        ):
+            old_keys = {k for m in getattr(old, attr, ()) for k in _member_keys(m)}
+            new_keys = {k for m in getattr(new, attr, ()) for k in _member_keys(m)}
+            for key in old_keys - new_keys:
+                reverse_index[key].discard(group_id)
+                if not reverse_index[key]:
+                    del reverse_index[key]
+            for key in new_keys - old_keys:
+                reverse_index[key].add(group_id)
+            if forward_index is not None:
+                if new_keys:
+                    forward_index[group_id] = frozenset(new_keys)
+                else:
+                    forward_index.pop(group_id, None)
+
+    def sync_contacts(self, contacts: Iterable[Contact]) -> None:
+        "Apply a complete re-listing of contacts, only touching the ones which changed"
+        seen = set[str]()
+        for contact in contacts:
+            if key := _contact_key(contact):
+                seen.add(key)
+                self.upsert_contact(contact)
+        for key in self._contacts.keys() - seen:
+            self.remove_contact(self._contacts[key])
+
+    def sync_groups(self, groups: Iterable[Group]) -> None:
+        "Apply a complete re-listing of groups, only touching the ones which changed"
+        seen = set[str]()
+        for group in groups:
+            seen.add(group.id)
+            self.upsert_group(group)
+        for group_id in self._groups.keys() - seen:
+            self.remove_group(group_id)
+
+    # -- staleness from events --
+
+    @property
+    def is_stale(self) -> bool:
+        return bool(
+            self._stale_contacts
+            or self._stale_recipients
+            or self._stale_groups
+            or self._stale_group_ids
+        )
+
+    def observe(self, event: MessageOrError) -> None:
+        """Mark contacts and groups which an event received from signal-cli shows to be stale."""
+        match event:
+            case Message(envelope=envelope) if envelope:
+                for group_id, group_info in group_infos(envelope):
+                    changed = self._group_revisions.observe(group_info)
+                    if changed or group_id not in self._groups:
+                        self._stale_group_ids.add(group_id)
+                if sync := envelope.sync_message:
+                    match sync.type:
+                        case SyncMessageType.CONTACTS_SYNC:
+                            self._stale_contacts = True
+                        case SyncMessageType.GROUPS_SYNC:
+                            self._stale_groups = True
+                    self._stale_recipients.update(filter(None, sync.blocked_numbers))
+                    self._stale_group_ids.update(filter(None, sync.blocked_group_ids))
+
+    async def refresh(self, session: SignalCliRPCSession) -> None:
+        """Re-list whatever `observe` marked stale, and apply the results incrementally."""
+        if self._stale_contacts:
+            self._stale_contacts = False
+            self._stale_recipients.clear()
+            self.sync_contacts(await self.contacts_command.get(session))
+        elif recipients := tuple(self._stale_recipients):
+            self._stale_recipients.clear()
+            for contact in await ListContacts(recipients=recipients).get(session):
+                self.upsert_contact(contact)
+
+        if self._stale_groups:
+            self._stale_groups = False
+            self._stale_group_ids.clear()
+            self.sync_groups(await ListGroups().get(session))
+        elif group_ids := tuple(self._stale_group_ids):
+            self._stale_group_ids.clear()
+            groups = await ListGroups(group_ids=group_ids).get(session)
+            for group in groups:
+                self.upsert_group(group)
+            for group_id in set(group_ids) - {group.id for group in groups}:
+                self.remove_group(group_id)
+
+    def apply_contacts_diff(self, diff: SnapshotDiff[Contact]) -> None:
+        for contact in diff.removed:
+            self.remove_contact(contact)
+        for contact in chain(diff.added, (new for _, new in diff.changed)):
+            self.upsert_contact(contact)
+
+    def apply_groups_diff(self, diff: SnapshotDiff[Group]) -> None:
+        for group in diff.removed:
+            self.remove_group(group.id)
+        for group in chain(diff.added, (new for _, new in diff.changed)):
+            self.upsert_group(group)
@@ -0,0 +1,206 @@
+"""
+An event stream which survives dropped connections: it reconnects on its own, and can backfill
+the gap with `Receive`.
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+from aiohttp import ClientError, ClientResponse, ClientTimeout
+
+from .commands import Receive
+from .dedup import EventDeduplicator
+from .session import MessageOrError, SignalCliRPCSession, event_from_json
+
+# (`TimeoutError` when the stream was idle)
+_CONNECTION_ERRORS = (ClientError, TimeoutError)
+
+
+@dataclass(frozen=True)
+class Reconnect:
+    error: Exception | None
+    "why the connection was lost (`None` if signal-cli ended the stream)"
+    attempts: int
+    "connection attempts until the stream was connected again"
+    recovery_time: float
+    "seconds from losing the connection until connected again (and the gap backfilled)"
+    backfilled: int
+    "events received by backfilling the gap, which would have been lost otherwise"
+    duplicates: int
+    "backfilled events dropped because they had already been received"
+    backfill_error: Exception | None = None
+
+
+@dataclass
+class EventStreamStats:
+    events: int = 0
+    reconnects: int = 0
+    backfilled: int = 0
+    recovery_time: float = 0.0
+    "total seconds spent reconnecting"
+    undecodable: int = 0
+    "events skipped because they couldn't be decoded"
+
+
+class ResilientEvents:
+    """
+    Yields events like `SignalCliRPCSession.signal_cli_events`, but reconnects when the
+    connection fails, or when nothing (not even a keep-alive) has been received for
+    `idle_timeout` seconds. The first attempt to reconnect is immediate; later ones (and those
+    after connections which were lost again right away) wait an exponentially increasing,
+    jittered `backoff`.
+
+    With `backfill`, the `Receive` command is run after reconnecting, to get the events of the
+    gap. (signal-cli only allows `Receive` if it doesn't receive messages on its own, see its
+    `--receive-mode`.) Events are then deduplicated with `dedup`, by default one remembering the
+    last 10 minutes exactly.
+
+    Events which can't be decoded are skipped, and passed (as received) to `on_decode_error` with
+    the error. Each reconnect is passed to `on_reconnect`, and totals are kept in `stats`.
+    """
+
+    def __init__(
+        self,
+        session: SignalCliRPCSession,
+        *,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        idle_timeout: float | None = 90.0,
+        connect_timeout: float = 30.0,
+        backfill: Receive | None = None,
+        dedup: EventDeduplicator | None = None,
+        on_reconnect: Callable[[Reconnect], None] | None = None,
+        on_decode_error: Callable[[Any, Exception], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.session = session
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.backfill = backfill
+        if dedup is None and backfill is not None:
+            dedup = EventDeduplicator(bloom_capacity=0)
+        self.dedup = dedup
+        self.on_reconnect = on_reconnect
+        self.on_decode_error = on_decode_error
+        self.clock = clock
+        self.stats = EventStreamStats()
+
+    async def __aiter__(self) -> AsyncIterator[MessageOrError]:
+        error: Exception | None = None
+        lost_at: float | None = None
+        attempts = failures = 0
+        while True:
+            if failures:
+                delay = min(self.max_backoff, self.backoff * 2 ** (failures - 1))
+                await asyncio.sleep(delay * random.uniform(0.5, 1))
+            attempts += 1
+            try:
+                response = await self._connect()
+            except _CONNECTION_ERRORS:
+                failures += 1
+                continue
+
+            connected_at = self.clock()
+            received = False
+            try:
+                if lost_at is not None:
+                    async for event in self._recover(error, attempts, lost_at):
+                        yield event
+                async for event in self._read(response):
+                    received = True
+                    if self.dedup is None or not self.dedup.is_duplicate(event):
+                        self.stats.events += 1
+                        yield event
+                error = None
+            except _CONNECTION_ERRORS as e:
+                error = e
+            finally:
+                response.release()
+            lost_at = self.clock()
+            attempts = 0
+            # (reconnect immediately, unless the connection is lost again right away)
+            if received or lost_at - connected_at >= self.max_backoff:
+                failures = 0
+            else:
+                failures += 1
+
+    async def _connect(self) -> ClientResponse:
+        response = await self.session.get(
+            "events",
+            headers={"Accept": "text/event-stream", "Cache-Control": "no-cache"},
+            timeout=ClientTimeout(total=None, sock_connect=self.connect_timeout),
+        )
+        try:
+            response.raise_for_status()
+        except ClientError:
+            response.release()
+            raise
+        return response
+
+    async def _read(self, response: ClientResponse) -> AsyncIterator[MessageOrError]:
+        "The events of a Server-Sent Events `response`"
+        data = list[str]()
+        while True:
+            async with asyncio.timeout(self.idle_timeout):
+                line_bytes = await response.content.readline()
+            if not line_bytes:
+                return
+            line = line_bytes.decode().rstrip("\r\n")
+            if not line:
+                if data:
+                    event_data = "\n".join(data)
+                    data.clear()
+                    if event := self._decode(self.session.decode_event, event_data):
+                        yield event
+                continue
+            name, _, value = line.partition(":")
+            if name == "data":
+                data.append(value.removeprefix(" "))
+            # (other fields, and comments, which are only sent as keep-alives, are ignored)
+
+    def _decode[T](self, decode: Callable[[T], MessageOrError], data: T) -> MessageOrError | None:
+        try:
+            return decode(data)
+        except Exception as e:
+            self.stats.undecodable += 1
+            if self.on_decode_error:
+                self.on_decode_error(data, e)
+            return None
+
+    async def _recover(
+        self, error: Exception | None, attempts: int, lost_at: float
+    ) -> AsyncIterator[MessageOrError]:
+        backfilled = list[MessageOrError]()
+        duplicates = 0
+        backfill_error = None
+        if self.backfill is not None:
+            assert self.dedup is not None
+            try:
+                events_json = await self.session.rpc_result_json(self.backfill)
+            except Exception as e:
+                backfill_error = e
+            else:
+                for event_json in events_json:
+                    if not (event := self._decode(event_from_json, event_json)):
+                        continue
+                    if self.dedup.is_duplicate(event):
+                        duplicates += 1
+                    else:
+                        backfilled.append(event)
+
+        reconnect = Reconnect(
+            error, attempts, self.clock() - lost_at, len(backfilled), duplicates, backfill_error
+        )
+        self.stats.reconnects += 1
+        self.stats.backfilled += len(backfilled)
+        self.stats.recovery_time += reconnect.recovery_time
+        if self.on_reconnect:
+            self.on_reconnect(reconnect)
+        for event in backfilled:
+            self.stats.events += 1
+            yield event
@@ -0,0 +1,110 @@
+"""
+Handling events of different conversations concurrently, while the events of each conversation are
+handled one after the other, in the order they were received.
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterable, Awaitable, Callable
+
+from .conversation import Conversation, envelope_conversation
+from .session import Message, MessageOrError
+
+
+def event_conversation(event: MessageOrError) -> Conversation | None:
+    "The conversation of `event` (`None` for errors, which are handled in order, too)"
+    match event:
+        case Message(envelope=envelope) if envelope:
+            return envelope_conversation(envelope)
+        case _:
+            return None
+
+
+@dataclass
+class ExecutorStats:
+    events: int = 0
+    "events handled"
+    failed: int = 0
+    "events whose handler raised (with `on_error`)"
+    max_conversations: int = 0
+    "most conversations with pending events at the same time"
+
+
+class ConversationExecutor:
+    """
+    Calls `handler` for each event with up to `concurrency` events being handled at the same
+    time, but only one per conversation (see `event_conversation`), so each conversation's events
+    are handled in order.
+
+    Conversations with pending events take turns (one event each), so a busy conversation
+    doesn't hold up quiet ones. At most `max_pending` events are accepted before the oldest have
+    been handled; `submit` waits for room.
+
+    Exceptions of `handler` are passed to `on_error` if given, and otherwise raised from `run` (in
+    an `ExceptionGroup`, after cancelling the handling of other events).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[MessageOrError], Awaitable[None]],
+        *,
+        concurrency: int = 16,
+        max_pending: int = 1000,
+        on_error: Callable[[MessageOrError, Exception], None] | None = None,
+    ) -> None:
+        self.handler = handler
+        self.concurrency = concurrency
+        self.on_error = on_error
+        self.stats = ExecutorStats()
+        self._pending = dict[Conversation | None, deque[MessageOrError]]()
+        # conversations whose turn it is, each at most once, and not while its event is handled
+        self._ready = asyncio.Queue[Conversation | None]()
+        self._room = asyncio.Semaphore(max_pending)
+
+    async def submit(self, event: MessageOrError) -> None:
+        "Queue `event` for handling, once there's room"
+        await self._room.acquire()
+        key = event_conversation(event)
+        if key in self._pending:
+            self._pending[key].append(event)
+        else:
+            self._pending[key] = deque([event])
+            self.stats.max_conversations = max(self.stats.max_conversations, len(self._pending))
+            self._ready.put_nowait(key)
+
+    async def join(self) -> None:
+        "Wait until all queued events have been handled"
+        await self._ready.join()
+
+    async def run(self, events: AsyncIterable[MessageOrError]) -> None:
+        "Handle `events`, returning once they have ended and all of them have been handled"
+        async with asyncio.TaskGroup() as tasks:
+            workers = [tasks.create_task(self._work()) for _ in range(self.concurrency)]
+            async for event in events:
+                await self.submit(event)
+            await self.join()
+            for worker in workers:
+                worker.cancel()
+
+    async def _work(self) -> None:
+        while True:
+            key = await self._ready.get()
+            events = self._pending[key]
+            event = events.popleft()
+            try:
+                await self.handler(event)
+            except Exception as e:
+                if not self.on_error:
+                    raise
+                self.stats.failed += 1
+                self.on_error(event, e)
+            finally:
+                self.stats.events += 1
+                self._room.release()
+                if events:
+                    # back in line, behind the other conversations
+                    self._ready.put_nowait(key)
+                else:
+                    del self._pending[key]
+                self._ready.task_done()
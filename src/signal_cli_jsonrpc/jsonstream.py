@@ -0,0 +1,84 @@
+"""
+Incremental extraction of the items of a JSON-RPC response's `result` array, so large listings
+can be decoded one item at a time as the response streams in.
+"""
+
+import json
+import re
+from typing import Any, Iterator
+
+_RESULT_ARRAY_START = re.compile(rb'"result"\s*:\s*\[')
+_STRUCTURAL = re.compile(rb'[\[\]{},"]')
+# rest of a string, after its opening quote
+_STRING_REST = re.compile(rb'(?:[^"\\]++|\\.)*+"', re.DOTALL)
+_MAX_PREAMBLE = 1024 * 1024
+
+
+class ResultArrayItems:
+    """
+    Fed a JSON-RPC response in chunks, yields the raw JSON of each item of its `result` array as
+    soon as the item is complete. Only the item being scanned is buffered. The response around
+    the array (`id`, or an `error` instead of a `result`) is collected for `finish`.
+    """
+
+    def __init__(self) -> None:
+        self._envelope = bytearray()
+        self._buf = bytearray()
+        self._state = "preamble"
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        match self._state:
+            case "preamble":
+                self._envelope += chunk
+                if not (match := _RESULT_ARRAY_START.search(self._envelope)):
+                    if len(self._envelope) > _MAX_PREAMBLE:
+                        raise ValueError("No result array found in response")
+                    return
+                self._buf += self._envelope[match.end() :]
+                del self._envelope[match.end() :]
+                self._state = "array"
+            case "array":
+                self._buf += chunk
+            case "tail":
+                self._envelope += chunk
+                return
+
+        buf = self._buf
+        while True:
+            if self._in_string:
+                if not (match := _STRING_REST.match(buf, self._pos)):
+                    break
+                self._pos = match.end()
+                self._in_string = False
+                continue
+            if not (match := _STRUCTURAL.search(buf, self._pos)):
+                self._pos = len(buf)
+                break
+            self._pos = match.end()
+            match buf[match.start()]:
+                case 0x22:  # "
+                    self._in_string = True
+                case 0x5B | 0x7B:  # [ {
+                    self._depth += 1
+                case 0x5D if not self._depth:  # ] closing the result array
+                    if item := bytes(buf[: match.start()]).strip():
+                        yield item
+                    self._envelope += b"]" + buf[self._pos :]
+                    self._state = "tail"
+                    self._buf = bytearray()
+                    return
+                case 0x5D | 0x7D:  # ] }
+                    self._depth -= 1
+                case 0x2C if not self._depth:  # , between items
+                    yield bytes(buf[: match.start()]).strip()
+                    del buf[: self._pos]
+                    self._pos = 0
+
+    def finish(self) -> dict[str, Any]:
+        "Return the response with its `result` array emptied"
+        if self._state == "array":
+            raise ValueError("Response ended inside result array")
+        return json.loads(self._envelope)
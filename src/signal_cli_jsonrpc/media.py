@@ -0,0 +1,274 @@
+"""
+Content-addressed local cache of stickers and avatars, so repeated lookups cost no RPCs.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from hashlib import sha256
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Collection, Iterator
+from uuid import uuid7
+
+from .attachments import download
+from .commands import GetAvatar, GetSticker
+from .outputs import Group
+from .session import SignalCliRPCSession
+from .types import Contact, StickerPack
+
+
+@dataclass(frozen=True)
+class StickerPackProgress:
+    pack_id: str
+    total: int
+    done: int = 0
+    "stickers fetched (or already cached) so far"
+    failed: int = 0
+
+
+class MediaCache:
+    """
+    Stickers and avatars stored under `directory` by the SHA-256 of their content, with an
+    index (in `directory/index.sqlite3`) from what was requested to the content.
+
+    Stickers are immutable, so are keyed by `(pack_id, sticker_id)` alone. Avatars are keyed by
+    whose avatar they are plus a version (a profile's `last_update_timestamp`, a group's
+    revision, ...); requesting a different version refetches.
+
+    Once more than `max_bytes` are stored, least recently used entries are evicted, except those
+    being fetched or held (see `holding`).
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], *, max_bytes: int = 256 << 20) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            self.directory / "index.sqlite3", isolation_level=None, check_same_thread=False
+        )
+        # (the index is also used from worker threads, see `_store`)
+        self._db_lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, version TEXT NOT NULL, digest TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._fetches = dict[tuple[str, str], asyncio.Task[Path | None]]()
+        self._held = Counter[str]()
+        self._holding = ContextVar[tuple[set[str], ...]](f"holding-{id(self)}", default=())
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._db.close()
+
+    @contextmanager
+    def holding(self) -> Iterator[None]:
+        """
+        Keep the files returned within the `with` block (also to tasks started in it) from being
+        evicted until the block is left, e.g. while they are being read.
+        """
+        keys = set[str]()
+        token = self._holding.set((*self._holding.get(), keys))
+        try:
+            yield
+        finally:
+            self._holding.reset(token)
+            for key in keys:
+                self._held[key] -= 1
+                if not self._held[key]:
+                    del self._held[key]
+
+    def _hold(self, key: str) -> None:
+        for keys in self._holding.get():
+            if key not in keys:
+                keys.add(key)
+                self._held[key] += 1
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / digest[2:]
+
+    def lookup(self, key: str, version: str = "") -> Path | None:
+        "The cached file for `key` at `version`, if any (without fetching it)"
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT digest FROM entries WHERE key = ? AND version = ?", (key, version)
+            ).fetchone()
+            if not row or not (path := self._blob_path(row[0])).exists():
+                return None
+            self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._hold(key)
+        return path
+
+    async def get(
+        self,
+        session: SignalCliRPCSession,
+        key: str,
+        command: GetSticker | GetAvatar,
+        version: str = "",
+    ) -> Path | None:
+        """
+        The file for `key` at `version`, fetched with `command` unless already cached. Returns
+        `None` if signal-cli has no data for it.
+
+        The file may be evicted by later fetches unless this is called within `holding`.
+        """
+        if path := self.lookup(key, version):
+            return path
+        if not (task := self._fetches.get((key, version))):
+            task = self._fetches[key, version] = asyncio.create_task(
+                self._fetch(session, key, command, version)
+            )
+            task.add_done_callback(lambda _: self._fetches.pop((key, version), None))
+        if path := await asyncio.shield(task):
+            self._hold(key)
+        return path
+
+    async def _fetch(
+        self,
+        session: SignalCliRPCSession,
+        key: str,
+        command: GetSticker | GetAvatar,
+        version: str,
+    ) -> Path | None:
+        # (stickers and avatars are small, so are buffered to be stored in a worker thread)
+        data = BytesIO()
+        if await download(session, command, data) is None:
+            return None
+        keep = {key, *(fetching for fetching, _ in self._fetches)}
+        return await asyncio.to_thread(self._store, key, version, data.getvalue(), keep)
+
+    def _store(self, key: str, version: str, data: bytes, keep: Collection[str]) -> Path:
+        digest = sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        path.parent.mkdir(exist_ok=True)
+        partial = self.directory / f"{uuid7().hex}.part"
+        try:
+            partial.write_bytes(data)
+            partial.replace(path)
+        finally:
+            partial.unlink(missing_ok=True)
+        with self._db_lock:
+            old_digest = self._db.execute(
+                "SELECT digest FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, version, digest, size, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, version, digest, len(data), time.time()),
+            )
+            if old_digest and old_digest[0] != digest:
+                self._delete_unreferenced(old_digest[0])
+            self._evict(keep)
+        return path
+
+    def _delete_unreferenced(self, digest: str) -> None:
+        if not self._db.execute("SELECT 1 FROM entries WHERE digest = ?", (digest,)).fetchone():
+            self._blob_path(digest).unlink(missing_ok=True)
+
+    def _evict(self, keep: Collection[str]) -> None:
+        # entries sharing content are counted separately, which errs on the side of evicting
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        for key, digest, size in self._db.execute(
+            "SELECT key, digest, size FROM entries ORDER BY last_used"
+        ).fetchall():
+            if key in keep or key in self._held:
+                continue
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._delete_unreferenced(digest)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    async def sticker(
+        self, session: SignalCliRPCSession, pack_id: str, sticker_id: int
+    ) -> Path | None:
+        return await self.get(
+            session,
+            f"sticker:{pack_id}:{sticker_id}",
+            GetSticker(pack_id=pack_id, sticker_id=sticker_id),
+        )
+
+    async def warm_sticker_pack(
+        self,
+        session: SignalCliRPCSession,
+        pack: StickerPack,
+        *,
+        concurrency: int = 16,
+        on_progress: Callable[[StickerPackProgress], None] | None = None,
+    ) -> dict[int, Path]:
+        """
+        Fetch the cover and every sticker of `pack` (e.g. from `ListStickerPacks`) into this cache,
+        with up to `concurrency` `GetSticker` calls in flight, reporting each completed sticker
+        to `on_progress`. Returns the files of the stickers now cached, by sticker id (which are
+        held like in `holding` until this returns, so aren't evicted to make room for each other).
+        """
+        assert pack.pack_id, "sticker pack has no id"
+        pack_id = pack.pack_id
+        sticker_ids = list(
+            dict.fromkeys(
+                sticker.id for sticker in (pack.cover, *pack.stickers) if sticker is not None
+            )
+        )
+        progress = StickerPackProgress(pack_id, total=len(sticker_ids))
+        semaphore = asyncio.Semaphore(concurrency)
+        files = dict[int, Path]()
+
+        async def warm(sticker_id: int) -> None:
+            nonlocal progress
+            try:
+                async with semaphore:
+                    path = await self.sticker(session, pack_id, sticker_id)
+            except Exception:
+                path = None
+            if path:
+                files[sticker_id] = path
+                progress = replace(progress, done=progress.done + 1)
+            else:
+                progress = replace(progress, failed=progress.failed + 1)
+            if on_progress:
+                on_progress(progress)
+
+        with self.holding():
+            await asyncio.gather(*map(warm, sticker_ids))
+        return files
+
+    async def profile_avatar(self, session: SignalCliRPCSession, contact: Contact) -> Path | None:
+        if not (contact.profile and contact.profile.has_avatar):
+            return None
+        recipient = contact.uuid or contact.number
+        assert recipient, "contact has neither uuid nor number"
+        return await self.get(
+            session,
+            f"profile:{recipient}",
+            GetAvatar(profile=recipient),
+            str(contact.profile.last_update_timestamp),
+        )
+
+    async def contact_avatar(
+        self, session: SignalCliRPCSession, contact: Contact, version: str = ""
+    ) -> Path | None:
+        recipient = contact.uuid or contact.number
+        assert recipient, "contact has neither uuid nor number"
+        return await self.get(
+            session, f"contact:{recipient}", GetAvatar(contact=recipient), version
+        )
+
+    async def group_avatar(
+        self, session: SignalCliRPCSession, group: Group | str, revision: int
+    ) -> Path | None:
+        "Avatar of `group` (or group id) as of `revision` (see `GroupInfo.revision`)"
+        group_id = group.id if isinstance(group, Group) else group
+        return await self.get(
+            session, f"group:{group_id}", GetAvatar(group_id=group_id), str(revision)
+        )
@@ -0,0 +1,308 @@
+"""
+Durable queue of outgoing commands (e.g. `Send`), so commands which signal-cli hasn't confirmed
+yet survive a restart of the process and are retried.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Literal, Self
+
+from aiohttp import ClientError
+
+from . import commands
+from .session import (
+    RpcCommand,
+    RpcRequest,
+    RpcResponseError,
+    RpcResponseOk,
+    SignalCliRPCSession,
+)
+
+type OutboxState = Literal["pending", "done", "failed"]
+
+# errors for requests which can't succeed when retried: JSON-RPC's parse error, invalid request,
+# method not found and invalid params, and signal-cli's user error
+PERMANENT_ERROR_CODES = frozenset({-32700, -32600, -32601, -32602, -1})
+
+
+def is_transient(error: RpcResponseError) -> bool:
+    "Whether the command that failed with `error` may succeed when retried"
+    match error.error:
+        case {"code": int(code)}:
+            return code not in PERMANENT_ERROR_CODES
+        case _:
+            return True
+
+
+@dataclass(frozen=True)
+class OutboxEntry:
+    id: str
+    "the request id, which is the same for every attempt"
+    command: RpcCommand | None
+    "`None` if the stored command couldn't be decoded (see `error`)"
+    state: OutboxState
+    attempts: int
+    error: str | None
+    "the last error (JSON-RPC error object as JSON, or exception repr)"
+
+
+def _dump_command(command: RpcCommand) -> tuple[str, str]:
+    # only the fields which differ from their defaults, as passing mutually exclusive fields to
+    # the constructor is an error even if they have their default values
+    params = {
+        f.name: value for f in fields(command) if (value := getattr(command, f.name)) != f.default
+    }
+    return type(command).__name__, json.dumps(params)
+
+
+def _load_command(name: str, params: str) -> RpcCommand:
+    command_type = getattr(commands, name)
+    defaults = {f.name: f.default for f in fields(command_type)}
+    # command parameters are scalars or tuples of them (and rows written before only non-default
+    # fields were stored have all of them)
+    loaded = {k: tuple(v) if isinstance(v, list) else v for k, v in json.loads(params).items()}
+    return command_type(**{k: v for k, v in loaded.items() if v != defaults[k]})
+
+
+class Outbox:
+    """
+    Commands are written to the sqlite database at `path` (in WAL mode) before they're sent by
+    `run`, and marked done once signal-cli has returned a result for them.
+
+    Commands whose request fails, or which signal-cli fails with a transient error (see
+    `is_transient`), are retried with exponential backoff, up to `max_attempts` times. Commands
+    still pending when the process stops are sent again once `run` is restarted. Every attempt
+    reuses the command's request id, so it can be used as an idempotency key.
+
+    Writes are committed in groups (in a worker thread): all commands enqueued (and results
+    recorded) while the previous group was being committed share one transaction and disk sync.
+
+    Commands which can't be decoded from the database are marked failed.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_attempts: int = 8,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        is_transient: Callable[[RpcResponseError], bool] = is_transient,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.is_transient = is_transient
+        self.clock = clock
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        # (the database is also used from worker threads, see `_commit`)
+        self._db_lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # (WAL's default of NORMAL may lose the last commits on power loss)
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id TEXT PRIMARY KEY, command TEXT NOT NULL, params TEXT NOT NULL,"
+            " state TEXT NOT NULL, attempts INTEGER NOT NULL, next_attempt REAL NOT NULL,"
+            " error TEXT)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_due ON outbox (state, next_attempt, id)"
+        )
+        self._writes = list[tuple[str, tuple, asyncio.Future[None]]]()
+        self._writer: asyncio.Task[None] | None = None
+        self._wakeup = asyncio.Event()
+
+    async def enqueue(self, command: RpcCommand, *, id: str | None = None) -> str:
+        """
+        Add `command` to the outbox, returning its request id once it has been committed to disk.
+        Enqueueing an `id` which is already in the outbox does nothing.
+        """
+        request = RpcRequest(command._rpc_method_name, command)
+        if id is not None:
+            request = RpcRequest(request.method, command, id)
+        assert request.id
+        await self._write(
+            "INSERT OR IGNORE INTO outbox (id, command, params, state, attempts, next_attempt)"
+            " VALUES (?, ?, ?, 'pending', 0, ?)",
+            (request.id, *_dump_command(command), self.clock()),
+        )
+        self._wakeup.set()
+        return request.id
+
+    async def _write(self, sql: str, params: tuple) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._writes.append((sql, params, future))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._commit_writes())
+        await future
+
+    async def _commit_writes(self) -> None:
+        while self._writes:
+            # let everyone who is about to write join this group
+            await asyncio.sleep(0)
+            group, self._writes = self._writes, []
+            try:
+                await asyncio.to_thread(self._commit, [(sql, params) for sql, params, _ in group])
+            except Exception as e:
+                for _, _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for _, _, future in group:
+                    if not future.done():
+                        future.set_result(None)
+
+    def _commit(self, writes: list[tuple[str, tuple]]) -> None:
+        with self._db_lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                for sql, params in writes:
+                    self._db.execute(sql, params)
+                self._db.execute("COMMIT")
+            except Exception:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                raise
+
+    def _query(self, sql: str, params: tuple = ()) -> list[Any]:
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _update(self, sql: str, params: tuple = ()) -> int:
+        with self._db_lock:
+            return self._db.execute(sql, params).rowcount
+
+    async def run(
+        self, session: SignalCliRPCSession, *, concurrency: int = 1, batch_size: int = 256
+    ) -> None:
+        """
+        Send commands as they become due (oldest first), with up to `concurrency` in flight,
+        until cancelled. With a `concurrency` of 1, commands are sent in the order they were
+        enqueued, except for retries.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        in_flight = dict[str, asyncio.Task[None]]()
+        try:
+            while True:
+                self._wakeup.clear()
+                rows = self._query(
+                    "SELECT id, command, params, attempts FROM outbox"
+                    " WHERE state = 'pending' AND next_attempt <= ?"
+                    " ORDER BY next_attempt, id LIMIT ?",
+                    (self.clock(), batch_size + len(in_flight)),
+                )
+                started = 0
+                for id, name, params, attempts in rows:
+                    if id in in_flight:
+                        continue
+                    started += 1
+                    try:
+                        command = _load_command(name, params)
+                    except Exception as e:
+                        await self._write(
+                            "UPDATE outbox SET state = 'failed', error = ? WHERE id = ?",
+                            (repr(e), id),
+                        )
+                        continue
+                    await semaphore.acquire()
+                    task = in_flight[id] = asyncio.create_task(
+                        self._dispatch(session, id, command, attempts)
+                    )
+                    task.add_done_callback(lambda _, id=id: in_flight.pop(id, None))
+                    task.add_done_callback(lambda _: semaphore.release())
+                if started >= batch_size:
+                    # there may be more due already
+                    continue
+
+                [(next_attempt,)] = self._query(
+                    "SELECT MIN(next_attempt) FROM outbox WHERE state = 'pending'"
+                    " AND next_attempt > ?",
+                    (self.clock(),),
+                )
+                timeout = None if next_attempt is None else next_attempt - self.clock()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except TimeoutError:
+                    pass
+        finally:
+            for task in in_flight.values():
+                task.cancel()
+
+    async def _dispatch(
+        self, session: SignalCliRPCSession, id: str, command: RpcCommand, attempts: int
+    ) -> None:
+        attempts += 1
+        try:
+            response = await session.rpc_request(RpcRequest(command._rpc_method_name, command, id))
+        except Exception as e:
+            # a response which couldn't be decoded may still mean success, so isn't retried
+            error, transient = repr(e), isinstance(e, (ClientError, TimeoutError))
+        else:
+            match response:
+                case RpcResponseOk():
+                    await self._write(
+                        "UPDATE outbox SET state = 'done', attempts = ?, error = NULL WHERE id = ?",
+                        (attempts, id),
+                    )
+                    return
+                case RpcResponseError() as response_error:
+                    error = json.dumps(response_error.error)
+                    transient = self.is_transient(response_error)
+
+        if transient and attempts < self.max_attempts:
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+            state, next_attempt = "pending", self.clock() + delay * random.uniform(0.5, 1)
+        else:
+            state, next_attempt = "failed", self.clock()
+        await self._write(
+            "UPDATE outbox SET state = ?, attempts = ?, next_attempt = ?, error = ? WHERE id = ?",
+            (state, attempts, next_attempt, error, id),
+        )
+        self._wakeup.set()
+
+    def entry(self, id: str) -> OutboxEntry | None:
+        rows = self._query(
+            "SELECT command, params, state, attempts, error FROM outbox WHERE id = ?", (id,)
+        )
+        if not rows:
+            return None
+        [(name, params, state, attempts, error)] = rows
+        try:
+            command = _load_command(name, params)
+        except Exception:
+            command = None
+        return OutboxEntry(id, command, state, attempts, error)
+
+    def counts(self) -> dict[OutboxState, int]:
+        "Number of commands in each state"
+        return dict(self._query("SELECT state, COUNT(*) FROM outbox GROUP BY state"))
+
+    def retry_failed(self) -> int:
+        "Make failed commands pending again (with fresh attempts), returning how many there were"
+        return self._update(
+            "UPDATE outbox SET state = 'pending', attempts = 0, next_attempt = ?"
+            " WHERE state = 'failed'",
+            (self.clock(),),
+        )
+
+    def delete_done(self) -> int:
+        "Delete commands which have been sent, returning how many there were"
+        return self._update("DELETE FROM outbox WHERE state = 'done'")
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._db.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -48,7 +48,8 @@ class GroupMember:
     uuid: str
 
 
-type GroupPermission = Literal["EVERY_MEMBER", "ONLY_ADMINS"]
+# (not a `type` alias, which dacite can't see through when decoding `Group`s)
+GroupPermission = Literal["EVERY_MEMBER", "ONLY_ADMINS"]
 
 
 @dataclass(frozen=True)
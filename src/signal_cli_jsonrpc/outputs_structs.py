@@ -0,0 +1,99 @@
+from typing import Literal
+
+from caseutil import to_camel
+from msgspec import Struct, field
+
+from .types_structs import SendMessageResult
+
+
+class Empty(Struct, frozen=True, rename=to_camel):
+    """
+    Output type for commands which produce no output.
+
+    (Technically, `signal-cli` [returns an empty object (`{}`)]([1]) in the `result` field for these
+    commands so this object mirrors that.)
+
+    [[1]]: https://github.com/AsamK/signal-cli/blob/3b784aa32be92b448d93fafb1cbe0727ad1d24eb/src/main/java/org/asamk/signal/jsonrpc/SignalJsonRpcCommandHandler.java#L275
+    """
+
+
+class UserStatus(Struct, frozen=True, rename=to_camel):
+    recipient: str
+    number: str | None
+    username: str | None
+    uuid: str
+    is_Registered: bool
+
+
+class JoinGroupResult(Struct, frozen=True, rename=to_camel):
+    timestamp: int
+    results: list[SendMessageResult]
+    group_Id: str
+    only_Requested: bool = False
+
+
+class GroupMember(Struct, rename=to_camel):
+    number: str
+    uuid: str
+
+
+GroupPermission = Literal["EVERY_MEMBER", "ONLY_ADMINS"]
+
+
+class Group(Struct, frozen=True, rename=to_camel):
+    id: str
+    name: str
+    description: str | None
+    is_member: bool
+    is_blocked: bool
+    message_expiration_time: int
+    members: list[GroupMember]
+    pending_members: list[GroupMember]
+    requesting_members: list[GroupMember]
+    admins: list[GroupMember]
+    banned: list[GroupMember]
+    permission_add_member: GroupPermission
+    permission_edit_details: GroupPermission
+    permission_send_message: GroupPermission
+    group_invite_link: str | None
+
+
+class Device(Struct, frozen=True, rename=to_camel):
+    id: int
+    name: str
+    created_timestamp: int
+    last_seen_timestamp: int
+
+
+class Identity(Struct, frozen=True, rename=to_camel):
+    number: str
+    uuid: str
+    fingerprint: str
+    safety_number: str
+    scannable_safety_number: str
+    trust_level: str
+    added_timestamp: int
+
+
+class UpdateGroupResult(Struct, frozen=True, rename=to_camel):
+    timestamp: int | None = None
+    results: list[SendMessageResult] = field(default_factory=list)
+    group_id: str | None = None
+
+
+class UploadStickerPackResult(Struct, frozen=True, rename=to_camel):
+    url: str
+
+
+__all__ = [
+    "Device",
+    "Empty",
+    "Group",
+    "GroupMember",
+    "GroupPermission",
+    "Identity",
+    "JoinGroupResult",
+    "UpdateGroupResult",
+    "UploadStickerPackResult",
+    "UserStatus",
+]
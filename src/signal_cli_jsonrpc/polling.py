@@ -0,0 +1,124 @@
+"""
+Receiving events by polling `Receive`, for when the event stream can't be used (e.g. behind
+proxies which don't keep Server-Sent Events connections open).
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Callable
+
+from aiohttp import ClientError
+
+from .commands import Receive
+from .session import MessageOrError, SignalCliRPCSession, event_from_json
+
+_RETRIED_ERRORS = (ClientError, TimeoutError)
+
+
+@dataclass
+class PollStats:
+    polls: int = 0
+    empty_polls: int = 0
+    events: int = 0
+    failed_polls: int = 0
+    undecodable: int = 0
+    "events skipped because they couldn't be decoded"
+
+
+class ReceivePoller:
+    """
+    Yields events like `SignalCliRPCSession.signal_cli_events`, received with `Receive`
+    (`receive` gives its other parameters).
+
+    Each `Receive`'s `timeout` and `max_messages` are adapted to the rate events arrive at: while
+    idle, `timeout` grows up to `max_timeout` (and `max_messages` is 1, so an event is returned
+    as soon as it arrives); while busy, `timeout` is `min_timeout` and `max_messages` is about
+    the number of events arriving in `target_latency` seconds (up to `max_batch`).
+
+    The next `Receive` is already in flight while the events of the last one are processed.
+    Failed requests are retried with exponential, jittered `backoff`. Events which can't be
+    decoded are skipped (`Receive` has already acknowledged them), and passed to
+    `on_decode_error` with the error.
+    """
+
+    def __init__(
+        self,
+        session: SignalCliRPCSession,
+        *,
+        receive: Receive = Receive(),
+        min_timeout: float = 1.0,
+        max_timeout: float = 30.0,
+        max_batch: int = 500,
+        target_latency: float = 1.0,
+        smoothing: float = 0.3,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        on_decode_error: Callable[[Any, Exception], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.session = session
+        self.receive = receive
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.max_batch = max_batch
+        self.target_latency = target_latency
+        self.smoothing = smoothing
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_decode_error = on_decode_error
+        self.clock = clock
+        self.stats = PollStats()
+        self.timeout = min_timeout
+        "`timeout` of the next `Receive`"
+        self.max_messages = 1
+        "`max_messages` of the next `Receive`"
+        self.rate = 0.0
+        "events per second, as an exponential moving average"
+
+    async def __aiter__(self) -> AsyncIterator[MessageOrError]:
+        failures = 0
+        next_poll = asyncio.create_task(self._poll())
+        try:
+            while True:
+                try:
+                    events, elapsed = await next_poll
+                except _RETRIED_ERRORS:
+                    self.stats.failed_polls += 1
+                    failures += 1
+                    delay = min(self.max_backoff, self.backoff * 2 ** (failures - 1))
+                    await asyncio.sleep(delay * random.uniform(0.5, 1))
+                    next_poll = asyncio.create_task(self._poll())
+                    continue
+                failures = 0
+                self._adapt(len(events), elapsed)
+                next_poll = asyncio.create_task(self._poll())
+                for event in events:
+                    yield event
+        finally:
+            next_poll.cancel()
+
+    async def _poll(self) -> tuple[list[MessageOrError], float]:
+        command = replace(self.receive, timeout=self.timeout, max_messages=self.max_messages)
+        started = self.clock()
+        events_json = await self.session.rpc_result_json(command)
+        # (`Receive`'s output is decoded here: dacite can't see through `MessageOrError`)
+        events = list[MessageOrError]()
+        for event_json in events_json:
+            try:
+                events.append(event_from_json(event_json))
+            except Exception as e:
+                self.stats.undecodable += 1
+                if self.on_decode_error:
+                    self.on_decode_error(event_json, e)
+        self.stats.polls += 1
+        self.stats.events += len(events)
+        self.stats.empty_polls += not events_json
+        return events, self.clock() - started
+
+    def _adapt(self, count: int, elapsed: float) -> None:
+        rate = count / max(elapsed, 1e-3)
+        self.rate += self.smoothing * (rate - self.rate)
+        self.timeout = self.min_timeout if count else min(self.max_timeout, self.timeout * 2)
+        self.max_messages = max(1, min(self.max_batch, round(self.rate * self.target_latency)))
@@ -0,0 +1,172 @@
+"""
+Opt-in prefetching of attachments referenced by received envelopes, so handlers get local files
+instead of fetching them one by one with `GetAttachment`.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncGenerator, AsyncIterator, Collection, Iterator
+
+from .attachments import download
+from .commands import GetAttachment
+from .conversation import data_messages, envelope_group_id
+from .session import Message, MessageOrError, SignalCliRPCSession
+from .types import Attachment, MessageEnvelope, StoryMessage
+
+
+def attachment_refs(envelope: MessageEnvelope) -> Iterator[Attachment]:
+    """All attachments referenced by `envelope`, including previews, quotes and stories."""
+    for data_message in data_messages(envelope):
+        yield from filter(None, data_message.attachments)
+        for preview in filter(None, data_message.previews):
+            if preview.image:
+                yield preview.image
+        if quote := data_message.quote:
+            for quoted in filter(None, quote.attachments):
+                if quoted.thumbnail:
+                    yield quoted.thumbnail
+    sync = envelope.sync_message
+    for story_message in (envelope.story_message, sync and sync.sent_story_message):
+        if isinstance(story_message, StoryMessage):
+            if story_message.file_attachment:
+                yield story_message.file_attachment
+            text_attachment = story_message.text_attachment
+            if text_attachment and text_attachment.preview and text_attachment.preview.image:
+                yield text_attachment.preview.image
+
+
+@dataclass(frozen=True)
+class PrefetchedMessage:
+    event: MessageOrError
+    files: dict[str, Path] = field(default_factory=dict)
+    "local files of the prefetched attachments, by attachment id"
+
+
+class AttachmentPrefetcher:
+    """
+    Downloads attachments referenced by events into `directory` using at most `concurrency`
+    concurrent `GetAttachment` calls, fetching each attachment id only once.
+
+    Attachments larger than `max_size`, or whose content type doesn't start with one of
+    `content_types` (e.g. `"image/"`), are skipped.
+    """
+
+    def __init__(
+        self,
+        session: SignalCliRPCSession,
+        directory: str | os.PathLike[str],
+        *,
+        concurrency: int = 4,
+        max_size: int | None = None,
+        content_types: Collection[str] | None = None,
+        max_remembered: int = 10_000,
+    ) -> None:
+        self.session = session
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.content_types = tuple(content_types) if content_types is not None else None
+        self.max_remembered = max_remembered
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._fetches = OrderedDict[str, asyncio.Task[Path | None]]()
+
+    def wants(self, attachment: Attachment) -> bool:
+        if not attachment.id:
+            return False
+        if self.max_size is not None and (attachment.size or 0) > self.max_size:
+            return False
+        if self.content_types is not None:
+            return (attachment.content_type or "").startswith(self.content_types)
+        return True
+
+    async def prefetch(self, event: MessageOrError) -> dict[str, Path]:
+        """Fetch the wanted attachments of `event`, returning their local files by id."""
+        if not (isinstance(event, Message) and (envelope := event.envelope)):
+            return {}
+        fetches = dict[str, asyncio.Task[Path | None]]()
+        for attachment in attachment_refs(envelope):
+            if self.wants(attachment) and attachment.id not in fetches:
+                fetches[attachment.id] = self._fetch(envelope, attachment.id)
+        # failed downloads are left for handlers to fetch (or report) themselves; downloads are
+        # shared with other events, so aren't cancelled with this
+        paths = await asyncio.gather(*map(asyncio.shield, fetches.values()), return_exceptions=True)
+        return {id: path for id, path in zip(fetches, paths) if isinstance(path, Path)}
+
+    def _fetch(self, envelope: MessageEnvelope, attachment_id: str) -> asyncio.Task[Path | None]:
+        if task := self._fetches.get(attachment_id):
+            self._fetches.move_to_end(attachment_id)
+            return task
+        if group_id := envelope_group_id(envelope):
+            command = GetAttachment(id=attachment_id, group_id=group_id)
+        else:
+            command = GetAttachment(
+                id=attachment_id, recipient=envelope.source_uuid or envelope.source_number
+            )
+        task = self._fetches[attachment_id] = asyncio.create_task(
+            self._download(command, self.directory / Path(attachment_id).name)
+        )
+        task.add_done_callback(lambda task: self._forget_failed(attachment_id, task))
+        while len(self._fetches) > self.max_remembered:
+            self._fetches.popitem(last=False)
+        return task
+
+    def _forget_failed(self, attachment_id: str, task: asyncio.Task) -> None:
+        # so that the attachment is retried when it's seen again
+        if (task.cancelled() or task.exception()) and self._fetches.get(attachment_id) is task:
+            del self._fetches[attachment_id]
+
+    async def _download(self, command: GetAttachment, path: Path) -> Path | None:
+        if path.exists():
+            return path
+        partial = path.with_name(path.name + ".part")
+        async with self._semaphore:
+            if await download(self.session, command, partial) is None:
+                return None
+        partial.replace(path)
+        return path
+
+    async def prefetched(
+        self, events: AsyncIterator[MessageOrError], *, lookahead: int = 16
+    ) -> AsyncIterator[PrefetchedMessage]:
+        """
+        Yield `events` in order, each with its attachments already downloaded. Attachments of up
+        to `lookahead` following events are fetched while waiting on earlier ones.
+        """
+        queue = asyncio.Queue[asyncio.Future[PrefetchedMessage] | None](lookahead)
+
+        async def produce() -> None:
+            try:
+                async for event in events:
+                    prefetching = asyncio.ensure_future(self._prefetched(event))
+                    try:
+                        await queue.put(prefetching)
+                    except asyncio.CancelledError:
+                        prefetching.cancel()
+                        raise
+            except Exception as e:
+                failed = asyncio.get_running_loop().create_future()
+                failed.set_exception(e)
+                await queue.put(failed)
+            await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while prefetching := await queue.get():
+                yield await prefetching
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            # stop prefetching for events which won't be yielded anymore
+            while not queue.empty():
+                if (queued := queue.get_nowait()) is not None:
+                    if queued.done() and not queued.cancelled():
+                        queued.exception()
+                    queued.cancel()
+            if isinstance(events, AsyncGenerator):
+                await events.aclose()
+
+    async def _prefetched(self, event: MessageOrError) -> PrefetchedMessage:
+        return PrefetchedMessage(event, await self.prefetch(event))
@@ -0,0 +1,115 @@
+"""
+Coalescing of read/viewed receipts, so receipts for a burst of messages from the same sender are
+sent as one `SendReceipt` rather than one per message.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable, Literal, Self
+
+from .commands import SendReceipt
+from .session import Message, MessageOrError, SignalCliRPCSession
+
+type ReceiptType = Literal["read", "viewed"]
+type _ReceiptKey = tuple[str, str, ReceiptType]
+
+
+@dataclass
+class ReceiptStats:
+    receipts: int = 0
+    "distinct receipts added"
+    requests: int = 0
+    "`SendReceipt` requests sent for them"
+    failed_requests: int = 0
+
+
+class ReceiptAggregator:
+    """
+    Collects receipts per (account, recipient, type) for `window` seconds after the first one,
+    then sends all of them as one `SendReceipt` (or earlier, once `max_timestamps` are pending).
+    Pending receipts are sent by `flush`, which is also called when leaving `async with`.
+
+    Receipts are best effort: failed requests are passed to `on_error` if given, and otherwise
+    dropped. (Commands have no account parameter, so receipts of all accounts are sent through
+    `session`; the account only keeps them apart.)
+    """
+
+    def __init__(
+        self,
+        session: SignalCliRPCSession,
+        *,
+        window: float = 1.0,
+        max_timestamps: int = 100,
+        on_error: Callable[[SendReceipt, Exception], None] | None = None,
+    ) -> None:
+        self.session = session
+        self.window = window
+        self.max_timestamps = max_timestamps
+        self.on_error = on_error
+        self.stats = ReceiptStats()
+        # target timestamps as keys of a dict, to keep their order
+        self._pending = dict[_ReceiptKey, dict[int, None]]()
+        self._timers = dict[_ReceiptKey, asyncio.TimerHandle]()
+        self._sending = set[asyncio.Task[None]]()
+
+    def add(
+        self, recipient: str, timestamp: int, type: ReceiptType = "read", *, account: str = ""
+    ) -> None:
+        "Queue a receipt to `recipient` for their message sent at `timestamp`"
+        key = (account, recipient, type)
+        timestamps = self._pending.setdefault(key, {})
+        if timestamp in timestamps:
+            return
+        timestamps[timestamp] = None
+        self.stats.receipts += 1
+        if len(timestamps) >= self.max_timestamps:
+            self._start_send(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self.window, self._start_send, key
+            )
+
+    def observe(self, event: MessageOrError, type: ReceiptType = "read") -> bool:
+        "Queue a receipt for `event` if it is a (possibly edited) message, returning whether it was"
+        match event:
+            case Message(account, envelope) if envelope and (
+                envelope.data_message or envelope.edit_message
+            ):
+                if recipient := envelope.source_uuid or envelope.source_number:
+                    self.add(recipient, envelope.timestamp, type, account=account)
+                    return True
+        return False
+
+    def _start_send(self, key: _ReceiptKey) -> None:
+        if timer := self._timers.pop(key, None):
+            timer.cancel()
+        if not (timestamps := self._pending.pop(key, None)):
+            return
+        task = asyncio.create_task(self._send(key, tuple(timestamps)))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, key: _ReceiptKey, timestamps: tuple[int, ...]) -> None:
+        _, recipient, type = key
+        assert timestamps
+        command = SendReceipt(recipient=recipient, target_timestamps=timestamps, type=type)
+        self.stats.requests += 1
+        try:
+            await self.session.rpc_output(command)
+        except Exception as e:
+            self.stats.failed_requests += 1
+            if self.on_error:
+                self.on_error(command, e)
+
+    async def flush(self) -> None:
+        "Send all pending receipts now, and wait until all sent receipts are done"
+        for key in list(self._pending):
+            self._start_send(key)
+        if self._sending:
+            await asyncio.gather(*self._sending)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.flush()
@@ -0,0 +1,158 @@
+"""
+Dispatching events to the handlers whose routes (kind, group, sender, attachments, text prefix)
+match them, by lookups in tables compiled from the routes rather than by asking every handler.
+"""
+
+import inspect
+from dataclasses import dataclass
+from itertools import product
+from typing import Any, Awaitable, Callable, Iterator, Literal
+
+from .conversation import data_messages, envelope_conversation
+from .session import Message, MessageError, MessageOrError
+
+type EventKind = Literal["data", "edit", "story", "sync", "call", "receipt", "typing", "error"]
+type Handler = Callable[[MessageOrError], Awaitable[Any] | Any]
+
+# (kind, group id, sender, has attachment); `None` matches any value
+type _IndexKey = tuple[EventKind | None, str | None, str | None, bool | None]
+
+
+@dataclass(frozen=True, kw_only=True)
+class Route:
+    """
+    Which events a handler gets: those matching all given fields. `sender` matches the source's
+    uuid or number; `text_prefix` matches the start of the text of a data message.
+    """
+
+    kind: EventKind | None = None
+    group_id: str | None = None
+    sender: str | None = None
+    has_attachment: bool | None = None
+    text_prefix: str | None = None
+
+
+def event_kinds(event: MessageOrError) -> list[EventKind]:
+    "The kinds of messages in `event`'s envelope (usually just one)"
+    match event:
+        case MessageError():
+            return ["error"]
+        case Message(envelope=None):
+            return []
+    assert event.envelope
+    envelope = event.envelope
+    kinds = list[EventKind]()
+    for kind, message in (
+        ("data", envelope.data_message),
+        ("edit", envelope.edit_message),
+        ("story", envelope.story_message),
+        ("sync", envelope.sync_message),
+        ("call", envelope.call_message),
+        ("receipt", envelope.receipt_message),
+        ("typing", envelope.typing_message),
+    ):
+        if message is not None:
+            kinds.append(kind)
+    return kinds
+
+
+@dataclass
+class _Bucket:
+    "Handlers of routes with the same index key, by text prefix (`None` for routes without one)"
+
+    by_prefix: dict[str | None, list[int]]
+    prefix_lengths: list[int]
+
+
+class Router:
+    """
+    Handlers are added with a `Route` (or with `route`, as decorator), and `dispatch` calls the
+    handlers whose routes match an event, in the order they were added.
+
+    Routes are compiled into a hash table by (kind, group id, sender, has attachment), with
+    every field either a value or a wildcard. An event is looked up under the combinations of
+    its own values and wildcards, and then by the prefixes of its text with the lengths of the
+    text prefixes in the matching table entries. So the cost of routing depends on the number of
+    distinct text prefix lengths, but not on the number of handlers.
+    """
+
+    def __init__(self) -> None:
+        self._routes = list[tuple[Route, Handler]]()
+        self._table: dict[_IndexKey, _Bucket] | None = None
+
+    def add(self, handler: Handler, route: Route = Route()) -> None:
+        self._routes.append((route, handler))
+        self._table = None
+
+    def route(self, **fields: Any) -> Callable[[Handler], Handler]:
+        "Decorator adding the decorated handler with the `Route` of the keyword arguments"
+
+        def decorator(handler: Handler) -> Handler:
+            self.add(handler, Route(**fields))
+            return handler
+
+        return decorator
+
+    def _compile(self) -> dict[_IndexKey, _Bucket]:
+        table = dict[_IndexKey, _Bucket]()
+        for i, (route, _) in enumerate(self._routes):
+            key = (route.kind, route.group_id, route.sender, route.has_attachment)
+            bucket = table.setdefault(key, _Bucket({}, []))
+            bucket.by_prefix.setdefault(route.text_prefix, []).append(i)
+        for bucket in table.values():
+            bucket.prefix_lengths = sorted({len(p) for p in bucket.by_prefix if p is not None})
+        return table
+
+    def _keys(self, event: MessageOrError) -> Iterator[_IndexKey]:
+        group_ids: list[str | None] = [None]
+        senders: list[str | None] = [None]
+        has_attachments: list[bool | None] = [None]
+        if isinstance(event, Message) and (envelope := event.envelope):
+            # (also the group of typing messages)
+            if (conversation := envelope_conversation(envelope)) and conversation.group_id:
+                group_ids.append(conversation.group_id)
+            senders.extend({envelope.source_uuid, envelope.source_number} - {None})
+            has_attachments.append(
+                any(any(m.attachments) for m in data_messages(envelope))
+                or bool(envelope.story_message and envelope.story_message.file_attachment)
+            )
+        kinds: list[EventKind | None] = [None, *event_kinds(event)]
+        return product(kinds, group_ids, senders, has_attachments)
+
+    @staticmethod
+    def _text(event: MessageOrError) -> str | None:
+        if isinstance(event, Message) and event.envelope:
+            for message in data_messages(event.envelope):
+                if message.message is not None:
+                    return message.message
+        return None
+
+    def handlers(self, event: MessageOrError) -> list[Handler]:
+        "The handlers whose routes match `event`, in the order they were added"
+        if self._table is None:
+            self._table = self._compile()
+        matched = set[int]()
+        text: str | None = None
+        text_known = False
+        for key in self._keys(event):
+            if not (bucket := self._table.get(key)):
+                continue
+            matched.update(bucket.by_prefix.get(None, ()))
+            if bucket.prefix_lengths:
+                if not text_known:
+                    text, text_known = self._text(event), True
+                if text is None:
+                    continue
+                for length in bucket.prefix_lengths:
+                    if length > len(text):
+                        break
+                    matched.update(bucket.by_prefix.get(text[:length], ()))
+        return [self._routes[i][1] for i in sorted(matched)]
+
+    async def dispatch(self, event: MessageOrError) -> int:
+        "Call (and await) the handlers matching `event`, returning how many there were"
+        handlers = self.handlers(event)
+        for handler in handlers:
+            if inspect.isawaitable(result := handler(event)):
+                await result
+        return len(handlers)
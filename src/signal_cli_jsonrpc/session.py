@@ -1,21 +1,52 @@
-import json
 import os
 from abc import ABCMeta
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
+from enum import Enum
 from types import GenericAlias
-from typing import TYPE_CHECKING, Any, AsyncIterator, Self
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterator, Literal, Self, get_args
 from uuid import uuid7
 
-from aiohttp import ClientSession
+from aiohttp import ClientResponse, ClientSession
 from aiohttp_sse_client.client import EventSource
-from attr import field
 from caseutil import to_camel, to_snake
-from dacite import from_dict
+from dacite import Config, from_dict
 
+from . import types as dataclass_types
+from .codec import JsonCodec, get_codec
+from .jsonstream import ResultArrayItems
 from .types import Error, MessageEnvelope
 from .utils import dict_transform_keys
 
 
+def _enums(scope: Any) -> Iterator[type[Enum]]:
+    "The enums defined in module or class `scope`, including those nested in its classes"
+    prefix = f"{scope.__qualname__}." if isinstance(scope, type) else ""
+    for value in vars(scope).values():
+        if not (isinstance(value, type) and value.__module__ == dataclass_types.__name__):
+            continue
+        if not value.__qualname__.startswith(prefix):
+            continue
+        if issubclass(value, Enum):
+            yield value
+        else:
+            yield from _enums(value)
+
+
+GENERATED_ENUMS = tuple(dict.fromkeys(_enums(dataclass_types)))
+"the `StrEnum`s of the generated types, whose values are their member names in lowercase"
+
+
+def enum_by_name[E: Enum](enum_type: type[E]) -> Callable[[Any], E]:
+    "Look up members of `enum_type` by name, as signal-cli sends them"
+    return lambda name: name if isinstance(name, enum_type) else enum_type[name]
+
+
+# JSON arrays are decoded as lists, but the generated types use tuples (and sets)
+DACITE_CONFIG = Config(
+    cast=[tuple, set], type_hooks={enum: enum_by_name(enum) for enum in GENERATED_ENUMS}
+)
+
+
 class _RpcCommandMeta[OutputType](ABCMeta):
     _rpc_method_name: str
     _rpc_output_type: type[OutputType]
@@ -63,7 +94,7 @@ class RpcCommand[OutputType](metaclass=_RpcCommandMeta):
 class RpcRequest[T]:
     method: str
     params: T
-    id: str | None = field(factory=lambda: str(uuid7()))
+    id: str | None = field(default_factory=lambda: str(uuid7()))
 
 
 @dataclass(frozen=True)
@@ -112,9 +143,27 @@ type MessageOrError = Message | MessageError
 
 
 class SignalCliRPCSession(ClientSession):
-    def __init__(self, *args, **kwargs) -> None:
+    ATTRS = ClientSession.ATTRS | {"codec", "decode"}
+
+    def __init__(
+        self,
+        *args,
+        codec: JsonCodec | None = None,
+        decode: Literal["dataclasses", "structs"] = "dataclasses",
+        **kwargs,
+    ) -> None:
+        """
+        `codec` is used for all JSON sent and received; by default the fastest one installed (see
+        `get_codec`).
+
+        With `decode="structs"` (which requires msgspec, see the `fast` extra), results are decoded
+        directly into the msgspec mirrors of their types (see `structs`) rather than into
+        dataclasses, which is much faster. Results msgspec can't decode are still decoded into dataclasses.
+        """
         base_url = os.environ["SIGNAL_CLI_ADDR"] + "/api/v1/"
         super().__init__(base_url, *args, **kwargs)
+        self.codec = codec or get_codec()
+        self.decode = decode
 
     if TYPE_CHECKING:
         # narrow return type so our custom methods can be called on result
@@ -124,21 +173,128 @@ class SignalCliRPCSession(ClientSession):
     async def signal_cli_events(self) -> AsyncIterator[MessageOrError]:
         async with EventSource("events", session=self) as sse_events:
             async for sse_event in sse_events:
-                signal_event = from_dict(MessageOrError, json.loads(sse_event.data))
-                yield signal_event
-
-    async def rpc[OutputT](self, command: RpcCommand[OutputT]) -> RpcResponse[OutputT]:
+                yield self.decode_event(sse_event.data)
+
+    def decode_event(self, data: str | bytes) -> MessageOrError:
+        "Decode the data of an event sent by signal-cli"
+        return event_from_json(self.codec.loads(data))
+
+    async def _send(self, request: RpcRequest, data: Any = None) -> ClientResponse:
+        if data is None:
+            data = self.codec.dumps(request_json(request))
+        return await self.post("rpc", data=data, headers={"Content-Type": "application/json"})
+
+    async def rpc_response(self, command: RpcCommand) -> tuple[RpcRequest, ClientResponse]:
+        """
+        Send `command`, returning the HTTP response without reading its body, so that the body
+        can be streamed. The caller is responsible for releasing the response.
+        """
         request = RpcRequest(command._rpc_method_name, command)
-        response_obj = await self.post("rpc", json=dict_transform_keys(to_camel, asdict(request)))
-        response_dict = dict_transform_keys(to_snake, await response_obj.json())
-        output_type = command._rpc_output_type
-        response = from_dict(_RpcMessageWrapper[RpcResponse[output_type]], response_dict)._
+        return request, await self._send(request)
+
+    async def _post_rpc(self, command: RpcCommand) -> tuple[RpcRequest, Any]:
+        request, response_obj = await self.rpc_response(command)
+        return request, self.codec.loads(await response_obj.read())
+
+    async def rpc_request[OutputT](
+        self, request: RpcRequest[RpcCommand[OutputT]], *, data: Any = None
+    ) -> RpcResponse[OutputT]:
+        """
+        Send an already built `request`, e.g. to retry it with the same id. If given, `data` (e.g.
+        an async iterable of `bytes`, to stream it) is sent as the body instead of `request`
+        serialized by `request_json`; it must serialize the same request.
+        """
+        response_obj = await self._send(request, data)
+        output_type = request.params._rpc_output_type
+        response = self._decode_response(await response_obj.read(), output_type)
         assert response.id == request.id
         return response
 
+    def _decode_response[OutputT](
+        self, data: bytes, output_type: type[OutputT]
+    ) -> RpcResponse[OutputT]:
+        if self.decode == "structs":
+            # (msgspec is optional, so only imported once needed)
+            from .structs import decode_response
+
+            if (response := decode_response(data, output_type)) is not None:
+                return response
+        response_dict = dict_transform_keys(to_snake, self.codec.loads(data))
+        # (dacite can't see through `type` aliases, so spell out `RpcResponse[output_type]`)
+        response_type = RpcResponseOk[output_type] | RpcResponseError
+        return from_dict(_RpcMessageWrapper[response_type], {"_": response_dict}, DACITE_CONFIG)._
+
+    def _decode_item[ItemT](self, data: bytes, item_type: type[ItemT]) -> ItemT:
+        if self.decode == "structs":
+            from .structs import struct_decoder
+
+            if decoder := struct_decoder(item_type):
+                return decoder.decode(data)
+        return from_json(item_type, self.codec.loads(data))
+
+    async def rpc[OutputT](self, command: RpcCommand[OutputT]) -> RpcResponse[OutputT]:
+        return await self.rpc_request(RpcRequest(command._rpc_method_name, command))
+
     async def rpc_output[OutputT](self, command: RpcCommand[OutputT]) -> OutputT:
-        match await self.rpc(command):
-            case RpcResponseOk(result):
-                return result
-            case RpcResponseError() as error:
-                raise error
+        return response_output(await self.rpc(command))
+
+    async def rpc_result_json(self, command: RpcCommand) -> Any:
+        """
+        Like `rpc_output`, but returns the `result` as raw JSON (with signal-cli's camelCase keys)
+        without decoding it. Use `from_json` to decode (parts of) it.
+        """
+        request, response_json = await self._post_rpc(command)
+        assert response_json.get("id") == request.id
+        if "error" in response_json:
+            raise RpcResponseError(response_json["error"], response_json.get("id"))
+        return response_json["result"]
+
+    async def rpc_iter[ItemT](
+        self, command: RpcCommand[list[ItemT]], *, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[ItemT]:
+        """
+        Like `rpc_output` for commands returning a list (e.g. `ListContacts`), but yields the items
+        one at a time, each decoded as soon as it has been received. Memory use is bounded by
+        the size of an item rather than by the size of the whole list.
+
+        An error returned by signal-cli is raised before anything is yielded, as it comes instead
+        of the result.
+        """
+        (item_type,) = get_args(command._rpc_output_type)
+        items = ResultArrayItems()
+        request, response = await self.rpc_response(command)
+        try:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                for item in items.feed(chunk):
+                    yield self._decode_item(item, item_type)
+            envelope = items.finish()
+        finally:
+            response.release()
+        assert envelope.get("id") == request.id
+        if "error" in envelope:
+            raise RpcResponseError(envelope["error"], envelope.get("id"))
+
+
+def response_output[T](response: RpcResponse[T]) -> T:
+    "Unwrap the result of `response`, raising it if it's an error"
+    match response:
+        case RpcResponseOk(result):
+            return result
+        case RpcResponseError() as error:
+            raise error
+
+
+def request_json(request: RpcRequest) -> dict[str, Any]:
+    "The JSON-RPC request object for `request`, as sent to signal-cli"
+    return dict_transform_keys(to_camel, asdict(request))
+
+
+def from_json[T](data_type: type[T], data: dict[str, Any]) -> T:
+    "Decode a raw JSON object (as sent by signal-cli) into `data_type`"
+    return from_dict(data_type, dict_transform_keys(to_snake, data), DACITE_CONFIG)
+
+
+def event_from_json(data: dict[str, Any]) -> MessageOrError:
+    "Decode a raw JSON event (as sent by signal-cli, or returned by `Receive`)"
+    # (picked explicitly: as a union, dacite would decode errors as `Message`s without envelope)
+    return from_json(MessageError if "error" in data else Message, data)
@@ -0,0 +1,282 @@
+"""
+Contact/group directory shared between processes through `multiprocessing.shared_memory`.
+
+One process (typically the one consuming signal-cli events and keeping a `Directory` up to
+date) publishes the directory with `SharedDirectoryWriter`; any number of worker processes
+attach with `SharedDirectoryReader` and look entries up directly in the shared pages, so memory
+stays flat as workers are added and only the publishing process talks to signal-cli.
+
+Each publication is written to a fresh segment (`<name>-<writer>-<generation>`) and then
+announced via a small control segment (`<name>`), so readers never observe a half-written
+directory. `<writer>` is a random id of the writer, so a writer which replaces one which crashed
+doesn't reuse its segment names.
+
+Segment layout (all integers little-endian)::
+
+    header   magic, generation, then (offset, slots) for each of `_TABLES`
+    tables   open-addressing hash tables of (key hash, key offset, key length,
+             record offset, record length) entries; empty slots have record length 0
+    blobs    keys and records; contact and group records are JSON objects, member records are
+             JSON arrays of group ids
+"""
+
+import json
+import os
+import struct
+from dataclasses import asdict
+from hashlib import blake2b
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator
+
+from .outputs import Group
+from .session import from_json
+from .types import Contact
+
+_MAGIC = b"SCDIR\x00\x00\x02"
+_TABLES = ("contact_uuid", "contact_number", "contact_username", "group_id", "member_groups")
+# magic, writer id, generation
+_CONTROL = struct.Struct("<8sIQ")
+_HEADER = struct.Struct("<8sQ" + "II" * len(_TABLES))
+_ENTRY = struct.Struct("<QIIII")
+
+
+def _hash(key: bytes) -> int:
+    # builtin `hash` is salted per process, so can't be shared
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+
+
+class _SegmentBuilder:
+    def __init__(self) -> None:
+        self.blobs = bytearray()
+        self.tables = {table: dict[bytes, tuple[int, int]]() for table in _TABLES}
+
+    def add_blob(self, blob: bytes) -> tuple[int, int]:
+        offset = len(self.blobs)
+        self.blobs += blob
+        return offset, len(blob)
+
+    def build(self, generation: int) -> bytes:
+        table_sizes = {table: 2 * len(entries) + 1 for table, entries in self.tables.items()}
+        tables_offset = _HEADER.size
+        blobs_offset = tables_offset + _ENTRY.size * sum(table_sizes.values())
+        # keys are stored after the records
+        keys = bytearray()
+
+        segment = bytearray(blobs_offset)
+        header_fields = list[int]()
+        table_offset = tables_offset
+        for table, entries in self.tables.items():
+            slots = table_sizes[table]
+            header_fields += [table_offset, slots]
+            for key, (record_offset, record_length) in entries.items():
+                key_hash = _hash(key)
+                key_offset = blobs_offset + len(self.blobs) + len(keys)
+                keys += key
+                slot = key_hash % slots
+                while _ENTRY.unpack_from(segment, table_offset + slot * _ENTRY.size)[4]:
+                    slot = (slot + 1) % slots
+                _ENTRY.pack_into(
+                    segment,
+                    table_offset + slot * _ENTRY.size,
+                    key_hash,
+                    key_offset,
+                    len(key),
+                    blobs_offset + record_offset,
+                    record_length,
+                )
+            table_offset += slots * _ENTRY.size
+
+        _HEADER.pack_into(segment, 0, _MAGIC, generation, *header_fields)
+        return bytes(segment + self.blobs + keys)
+
+
+def _segment_name(name: str, writer_id: int, generation: int) -> str:
+    return f"{name}-{writer_id:08x}-{generation}"
+
+
+class SharedDirectoryWriter:
+    """
+    Publishes contacts and groups to shared memory under `name`.
+
+    If the segments of a previous writer under `name` are still around (because it crashed),
+    they're taken over: the control segment is reused and its directory segments are unlinked.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.generation = 0
+        self.writer_id = int.from_bytes(os.urandom(4))
+        try:
+            self._control = SharedMemory(name, create=True, size=_CONTROL.size)
+        except FileExistsError:
+            self._control = SharedMemory(name)
+            self._unlink_stale()
+        self._segments = list[SharedMemory]()
+
+    def _unlink_stale(self) -> None:
+        magic, writer_id, generation = _CONTROL.unpack_from(self._control.buf)
+        if magic != _MAGIC:
+            return
+        # (the previous writer kept its last two generations)
+        for stale_generation in (generation, generation - 1):
+            try:
+                stale = SharedMemory(
+                    _segment_name(self.name, writer_id, stale_generation), track=False
+                )
+            except FileNotFoundError:
+                continue
+            stale.close()
+            stale.unlink()
+
+    def publish(self, contacts: Iterable[Contact], groups: Iterable[Group]) -> None:
+        builder = _SegmentBuilder()
+        for contact in contacts:
+            record = builder.add_blob(json.dumps(asdict(contact)).encode())
+            for table, key in (
+                ("contact_uuid", contact.uuid),
+                ("contact_number", contact.number),
+                ("contact_username", contact.username),
+            ):
+                if key:
+                    builder.tables[table][key.encode()] = record
+
+        member_groups = dict[str, list[str]]()
+        for group in groups:
+            builder.tables["group_id"][group.id.encode()] = builder.add_blob(
+                json.dumps(asdict(group)).encode()
+            )
+            for member in group.members:
+                for key in filter(None, (member.uuid, member.number)):
+                    member_groups.setdefault(key, []).append(group.id)
+        for key, group_ids in member_groups.items():
+            builder.tables["member_groups"][key.encode()] = builder.add_blob(
+                json.dumps(group_ids).encode()
+            )
+
+        self.generation += 1
+        data = builder.build(self.generation)
+        segment = SharedMemory(
+            _segment_name(self.name, self.writer_id, self.generation), create=True, size=len(data)
+        )
+        segment.buf[: len(data)] = data
+        _CONTROL.pack_into(self._control.buf, 0, _MAGIC, self.writer_id, self.generation)
+
+        # keep the previous generation around for readers which are just switching over
+        self._segments.append(segment)
+        while len(self._segments) > 2:
+            old = self._segments.pop(0)
+            old.close()
+            old.unlink()
+
+    def close(self) -> None:
+        for segment in [*self._segments, self._control]:
+            segment.close()
+            segment.unlink()
+        self._segments.clear()
+
+
+class SharedDirectoryReader:
+    """
+    Read-only view of a directory published by `SharedDirectoryWriter` under `name`.
+
+    Lookups hash into the shared tables and only decode the one record they return. Each lookup
+    first checks whether a newer generation was published and switches over to it if so.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.writer_id = 0
+        self.generation = 0
+        self._control = SharedMemory(name, track=False)
+        self._segment: SharedMemory | None = None
+        self._tables = dict[str, tuple[int, int]]()
+
+    def _buf(self) -> memoryview:
+        while True:
+            magic, writer_id, generation = _CONTROL.unpack_from(self._control.buf)
+            if magic != _MAGIC or not generation:
+                raise LookupError(f"Nothing published to {self.name!r} yet")
+            if (writer_id, generation) == (self.writer_id, self.generation):
+                break
+            try:
+                segment = SharedMemory(_segment_name(self.name, writer_id, generation), track=False)
+            except FileNotFoundError:
+                # already replaced by two newer generations (or a new writer), so look again
+                if _CONTROL.unpack_from(self._control.buf)[1:] == (writer_id, generation):
+                    raise LookupError(f"Directory published to {self.name!r} is gone") from None
+                continue
+            magic, _, *header_fields = _HEADER.unpack_from(segment.buf)
+            assert magic == _MAGIC
+            if self._segment is not None:
+                self._segment.close()
+            self._segment, self.writer_id, self.generation = segment, writer_id, generation
+            self._tables = dict(zip(_TABLES, zip(header_fields[::2], header_fields[1::2])))
+            break
+        assert self._segment is not None
+        return self._segment.buf
+
+    def _find(self, table: str, key: str) -> bytes | None:
+        buf = self._buf()
+        table_offset, slots = self._tables[table]
+        key_bytes = key.encode()
+        key_hash = _hash(key_bytes)
+        slot = key_hash % slots
+        while True:
+            entry_hash, key_offset, key_length, record_offset, record_length = _ENTRY.unpack_from(
+                buf, table_offset + slot * _ENTRY.size
+            )
+            if not record_length:
+                return None
+            if entry_hash == key_hash and buf[key_offset : key_offset + key_length] == key_bytes:
+                return bytes(buf[record_offset : record_offset + record_length])
+            slot = (slot + 1) % slots
+
+    def _contact(self, table: str, key: str) -> Contact | None:
+        record = self._find(table, key)
+        return from_json(Contact, json.loads(record)) if record else None
+
+    def contact_by_uuid(self, uuid: str) -> Contact | None:
+        return self._contact("contact_uuid", uuid)
+
+    def contact_by_number(self, number: str) -> Contact | None:
+        return self._contact("contact_number", number)
+
+    def contact_by_username(self, username: str) -> Contact | None:
+        return self._contact("contact_username", username)
+
+    def resolve(self, recipient: str) -> Contact | None:
+        "Look up a contact by whichever of uuid, number or username `recipient` is"
+        return (
+            self.contact_by_uuid(recipient)
+            or self.contact_by_number(recipient)
+            or self.contact_by_username(recipient)
+        )
+
+    def group(self, group_id: str) -> Group | None:
+        record = self._find("group_id", group_id)
+        return from_json(Group, json.loads(record)) if record else None
+
+    def groups_of(self, member: str) -> list[str]:
+        "Ids of groups which `member` (uuid or number) is a member of"
+        record = self._find("member_groups", member)
+        return json.loads(record) if record else []
+
+    def group_ids(self) -> Iterator[str]:
+        buf = self._buf()
+        table_offset, slots = self._tables["group_id"]
+        # (collected up front: a lookup during iteration may switch to a newer generation, which
+        # releases this one's memory)
+        group_ids = list[str]()
+        for slot in range(slots):
+            _, key_offset, key_length, _, record_length = _ENTRY.unpack_from(
+                buf, table_offset + slot * _ENTRY.size
+            )
+            if record_length:
+                group_ids.append(bytes(buf[key_offset : key_offset + key_length]).decode())
+        return iter(group_ids)
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        self._control.close()
@@ -0,0 +1,106 @@
+"""
+Incremental snapshots of `ListContacts` / `ListGroups`, diffed against the previous poll.
+
+Each raw JSON entry is hashed before anything is decoded, so only entries which are new or
+changed are turned into dataclasses; unchanged entries keep the objects from the previous
+snapshot.
+"""
+
+import json
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from typing import Any, Callable, Iterator, get_args
+
+from .commands import ListContacts, ListGroups
+from .outputs import Group
+from .session import RpcCommand, SignalCliRPCSession, from_json
+from .types import Contact
+
+
+@dataclass(frozen=True)
+class SnapshotDiff[T]:
+    added: list[T] = field(default_factory=list)
+    removed: list[T] = field(default_factory=list)
+    changed: list[tuple[T, T]] = field(default_factory=list)
+    "pairs of `(old, new)`"
+    unchanged: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def _contact_json_key(item: dict[str, Any]) -> str | None:
+    return item.get("uuid") or item.get("number") or item.get("username")
+
+
+def _group_json_key(item: dict[str, Any]) -> str | None:
+    return item.get("id")
+
+
+SNAPSHOT_KEYS: dict[type[RpcCommand], Callable[[dict[str, Any]], str | None]] = {
+    ListContacts: _contact_json_key,
+    ListGroups: _group_json_key,
+}
+"How to identify an entry of each snapshottable command's (raw JSON) output"
+
+
+def _digest(item: dict[str, Any]) -> bytes:
+    # signal-cli serializes records with a fixed key order, so no need to sort keys
+    return blake2b(json.dumps(item, separators=(",", ":")).encode(), digest_size=16).digest()
+
+
+class Snapshot[T]:
+    """
+    The latest listing of `command`, keyed by entry id.
+
+    `poll` re-runs the command and returns what changed since the previous poll. Entries whose
+    raw JSON digest is unchanged are neither decoded nor reallocated.
+    """
+
+    def __init__(self, command: RpcCommand[list[T]]) -> None:
+        self.command = command
+        self._key = SNAPSHOT_KEYS[type(command)]
+        (self._item_type,) = get_args(command._rpc_output_type)
+        self._entries = dict[str, tuple[bytes, T]]()
+
+    @classmethod
+    def contacts(cls, command: ListContacts = ListContacts()) -> Snapshot[Contact]:
+        return cls(command)
+
+    @classmethod
+    def groups(cls, command: ListGroups = ListGroups()) -> Snapshot[Group]:
+        return cls(command)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[T]:
+        return (obj for _, obj in self._entries.values())
+
+    def get(self, key: str) -> T | None:
+        return entry[1] if (entry := self._entries.get(key)) else None
+
+    async def poll(self, session: SignalCliRPCSession) -> SnapshotDiff[T]:
+        return self.apply(await session.rpc_result_json(self.command))
+
+    def apply(self, items: list[dict[str, Any]]) -> SnapshotDiff[T]:
+        """Replace the snapshot with a complete raw JSON listing, returning what changed."""
+        previous = self._entries
+        entries = dict[str, tuple[bytes, T]]()
+        added, changed, unchanged = list[T](), list[tuple[T, T]](), 0
+        for item in items:
+            if (key := self._key(item)) is None:
+                continue
+            digest = _digest(item)
+            match previous.pop(key, None):
+                case (old_digest, old) if old_digest == digest:
+                    entries[key] = (digest, old)
+                    unchanged += 1
+                case (_, old):
+                    entries[key] = (digest, new := from_json(self._item_type, item))
+                    changed.append((old, new))
+                case None:
+                    entries[key] = (digest, new := from_json(self._item_type, item))
+                    added.append(new)
+        self._entries = entries
+        return SnapshotDiff(added, [obj for _, obj in previous.values()], changed, unchanged)
@@ -0,0 +1,82 @@
+"""
+Persistent on-disk store of directory-style list command results, so a restarted process can
+serve them immediately instead of waiting for signal-cli (see `RpcCache(store=...)`).
+"""
+
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Self, get_args
+
+from .commands import ListContacts, ListGroups, ListIdentities, ListStickerPacks
+from .session import RpcCommand, from_json
+
+STORABLE_COMMANDS: tuple[type[RpcCommand], ...] = (
+    ListContacts,
+    ListGroups,
+    ListIdentities,
+    ListStickerPacks,
+)
+
+
+@dataclass(frozen=True)
+class StoredResult:
+    result: list[dict[str, Any]]
+    "raw JSON `result`, as sent by signal-cli"
+    snapshot_time: float
+    "when `result` was fetched from signal-cli (seconds since epoch)"
+
+
+def decode_list_result[T](command: RpcCommand[list[T]], result: list[dict[str, Any]]) -> list[T]:
+    (item_type,) = get_args(command._rpc_output_type)
+    return [from_json(item_type, item) for item in result]
+
+
+class DirectoryStore:
+    """sqlite3 database of raw list command results, keyed by command."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " command TEXT PRIMARY KEY, snapshot_time REAL NOT NULL, result TEXT NOT NULL)"
+        )
+
+    @staticmethod
+    def _key(command: RpcCommand) -> str:
+        if not isinstance(command, STORABLE_COMMANDS):
+            raise TypeError(f"{type(command).__name__} is not storable")
+        # frozen dataclass reprs are deterministic and include every parameter
+        return repr(command)
+
+    def load(self, command: RpcCommand) -> StoredResult | None:
+        row = self._db.execute(
+            "SELECT result, snapshot_time FROM results WHERE command = ?", (self._key(command),)
+        ).fetchone()
+        return StoredResult(json.loads(row[0]), row[1]) if row else None
+
+    def save(
+        self,
+        command: RpcCommand,
+        result: list[dict[str, Any]],
+        snapshot_time: float | None = None,
+    ) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (command, snapshot_time, result) VALUES (?, ?, ?)",
+            (self._key(command), snapshot_time or time.time(), json.dumps(result)),
+        )
+
+    def delete(self, command: RpcCommand) -> None:
+        self._db.execute("DELETE FROM results WHERE command = ?", (self._key(command),))
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,109 @@
+"""
+Decoding signal-cli's JSON straight into msgspec `Struct` mirrors of the dataclass model
+(`types_structs` and `outputs_structs`, generated by `gen.gen_structs`), skipping the key
+conversion and `from_dict` of the dataclass path, and conversion between mirrors and dataclasses.
+
+Mirrors have the same names and fields as the dataclasses they mirror (and reuse their enums).
+"""
+
+from functools import cache
+from types import UnionType
+from typing import Any, Union, get_args, get_origin
+
+try:
+    import msgspec
+except ImportError as e:
+    raise ImportError(
+        "decoding into structs requires msgspec, install signal-cli-jsonrpc[fast]"
+    ) from e
+
+from . import outputs, outputs_structs, types_structs
+from . import types as dataclass_types
+from .session import GENERATED_ENUMS, RpcResponse, RpcResponseError, RpcResponseOk
+
+STRUCTS = dict[type, type[msgspec.Struct]]()
+"mirrors of dataclasses"
+DATACLASSES = dict[type[msgspec.Struct], type]()
+"dataclasses of mirrors"
+
+
+def _add_mirrors(dataclass_scope: Any, struct_scope: Any, names: list[str]) -> None:
+    for name in names:
+        struct = getattr(struct_scope, name)
+        if isinstance(struct, type) and issubclass(struct, msgspec.Struct):
+            dataclass = getattr(dataclass_scope, name)
+            STRUCTS[dataclass], DATACLASSES[struct] = struct, dataclass
+            _add_mirrors(dataclass, struct, list(vars(struct)))
+
+
+_add_mirrors(dataclass_types, types_structs, types_structs.__all__)
+_add_mirrors(outputs, outputs_structs, outputs_structs.__all__)
+
+
+def _member_by_name(enum_type: Any, name: Any) -> Any:
+    return enum_type.__members__.get(name) if isinstance(name, str) else None
+
+
+# signal-cli sends the names of enum members, but msgspec decodes enums by value (the lowercase
+# names, with `auto()`), falling back to `_missing_`
+for _enum in GENERATED_ENUMS:
+    _enum._missing_ = classmethod(_member_by_name)  # type: ignore[method-assign]
+
+
+def struct_type(data_type: Any) -> Any:
+    "The mirror of `data_type`, which may also be e.g. `list[Contact]` or `Contact | None`"
+    if data_type in STRUCTS:
+        return STRUCTS[data_type]
+    if not (args := get_args(data_type)):
+        return data_type
+    struct_args = tuple(map(struct_type, args))
+    if (origin := get_origin(data_type)) in (Union, UnionType):
+        return Union[struct_args]
+    return origin[struct_args]
+
+
+def to_struct(obj: Any, data_type: Any = None) -> Any:
+    "Convert `obj` (of `data_type`, by default its class) to its mirror"
+    return msgspec.convert(obj, struct_type(data_type or type(obj)), from_attributes=True)
+
+
+def from_struct(obj: Any, data_type: Any = None) -> Any:
+    "Convert mirror `obj` to `data_type` (by default, the dataclass of its class)"
+    return msgspec.convert(obj, data_type or DATACLASSES[type(obj)], from_attributes=True)
+
+
+class _Response[T](msgspec.Struct):
+    id: str | None = None
+    result: T | msgspec.UnsetType = msgspec.UNSET
+    error: Any = None
+
+
+@cache
+def struct_decoder(data_type: Any) -> msgspec.json.Decoder | None:
+    "A decoder of JSON into the mirror of `data_type`, or `None` if msgspec can't decode it"
+    try:
+        return msgspec.json.Decoder(struct_type(data_type))
+    except TypeError:
+        # e.g. `MessageOrError`: msgspec only supports unions of structs with tag fields
+        return None
+
+
+@cache
+def _response_decoder(output_type: Any) -> msgspec.json.Decoder | None:
+    try:
+        return msgspec.json.Decoder(_Response[struct_type(output_type)])
+    except TypeError:
+        return None
+
+
+def decode_response(data: bytes, output_type: Any) -> RpcResponse[Any] | None:
+    """
+    Decode JSON-RPC response `data`, with its result decoded into the mirror of `output_type`.
+    Returns `None` if msgspec can't decode `output_type`.
+    """
+    if not (decoder := _response_decoder(output_type)):
+        return None
+    response = decoder.decode(data)
+    if response.error is not None:
+        return RpcResponseError(response.error, response.id)
+    return RpcResponseOk(response.result, response.id)
@@ -0,0 +1,133 @@
+"""
+Typing indicators kept per conversation, so handlers can say they're typing as often as they
+like while only state changes (and keep-alives) are sent as `SendTyping`.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable
+
+from .commands import Send, SendTyping
+from .conversation import Conversation, send_conversations
+from .session import SignalCliRPCSession
+
+INDICATOR_DURATION = 15.0
+"seconds a typing indicator is shown for without a new `SendTyping`"
+
+
+@dataclass
+class TypingStats:
+    requested: int = 0
+    "calls of `start` and `stop`"
+    requests: int = 0
+    "`SendTyping` requests sent"
+    failed_requests: int = 0
+
+
+@dataclass
+class _Typing:
+    until: float
+    keep_alive: asyncio.Task[None] | None = None
+
+
+class TypingManager:
+    """
+    Tracks whether we're typing in each conversation. `start` sends a typing indicator only if we
+    weren't typing there yet, and keeps it alive by sending it again every `refresh` seconds
+    until `stop` (or `sent`) is called, or until `start` hasn't been called for `idle_timeout`
+    seconds.
+
+    Sending a message ends the typing indicator in the recipients' clients, so `sent` (and
+    `send`) just forget that we're typing in the conversations the message went to.
+
+    Typing indicators are best effort: failed requests are passed to `on_error` if given, and
+    otherwise dropped.
+    """
+
+    def __init__(
+        self,
+        session: SignalCliRPCSession,
+        *,
+        refresh: float = INDICATOR_DURATION - 5,
+        idle_timeout: float = 60.0,
+        on_error: Callable[[SendTyping, Exception], None] | None = None,
+    ) -> None:
+        assert 0 < refresh < INDICATOR_DURATION
+        self.session = session
+        self.refresh = refresh
+        self.idle_timeout = idle_timeout
+        self.on_error = on_error
+        self.stats = TypingStats()
+        self._typing = dict[Conversation, _Typing]()
+
+    def is_typing(self, conversation: Conversation) -> bool:
+        return conversation in self._typing
+
+    async def start(self, conversation: Conversation, *, duration: float | None = None) -> None:
+        "Be typing in `conversation` for the next `duration` (by default `idle_timeout`) seconds"
+        self.stats.requested += 1
+        until = asyncio.get_running_loop().time() + (duration or self.idle_timeout)
+        if typing := self._typing.get(conversation):
+            typing.until = max(typing.until, until)
+            return
+        typing = self._typing[conversation] = _Typing(until)
+        await self._send(conversation.typing())
+        # (unless a message was sent or typing stopped while the request was in flight)
+        if self._typing.get(conversation) is typing:
+            typing.keep_alive = asyncio.create_task(self._keep_alive(conversation, typing))
+
+    async def stop(self, conversation: Conversation) -> None:
+        "Stop typing in `conversation`, if we're typing there"
+        self.stats.requested += 1
+        if self._forget(conversation):
+            await self._send(conversation.typing(stop=True))
+
+    def sent(self, send: Send) -> None:
+        "Forget typing in the conversations `send` goes to"
+        for conversation in send_conversations(send):
+            self._forget(conversation)
+
+    async def send(self, send: Send) -> None:
+        "Send `send`, which ends typing in its conversations"
+        self.sent(send)
+        await self.session.rpc_output(send)
+
+    @asynccontextmanager
+    async def typing(self, conversation: Conversation) -> AsyncIterator[None]:
+        "Be typing in `conversation` while in the context (unless a message is sent there)"
+        await self.start(conversation, duration=float("inf"))
+        try:
+            yield
+        finally:
+            await self.stop(conversation)
+
+    async def close(self) -> None:
+        "Stop typing in all conversations"
+        await asyncio.gather(*map(self.stop, list(self._typing)))
+
+    def _forget(self, conversation: Conversation) -> bool:
+        if not (typing := self._typing.pop(conversation, None)):
+            return False
+        if typing.keep_alive and typing.keep_alive is not asyncio.current_task():
+            typing.keep_alive.cancel()
+        return True
+
+    async def _keep_alive(self, conversation: Conversation, typing: _Typing) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(min(self.refresh, typing.until - loop.time()))
+            if loop.time() >= typing.until:
+                self._forget(conversation)
+                await self._send(conversation.typing(stop=True))
+                return
+            await self._send(conversation.typing())
+
+    async def _send(self, command: SendTyping) -> None:
+        self.stats.requests += 1
+        try:
+            await self.session.rpc_output(command)
+        except Exception as e:
+            self.stats.failed_requests += 1
+            if self.on_error:
+                self.on_error(command, e)
@@ -1,11 +1,34 @@
+from functools import cache, lru_cache
 from typing import Any, Callable
 
 
 type NonEmptyTuple[T] = tuple[T, *tuple[T, ...]]
 
 
+@cache
+def _memoized(transform: Callable[[str], str]) -> Callable[[str], str]:
+    # JSON objects of the same type repeat the same few keys, so most transforms are lookups
+    return lru_cache(maxsize=4096)(transform)
+
+
 def dict_transform_keys(transform: Callable[[str], str], dct: dict[str, Any]) -> dict[str, Any]:
+    "Apply `transform` to the keys of `dct` and of all dicts nested in it, also in lists or tuples"
+    return _transform_dict(_memoized(transform), dct)
+
+
+def _transform_dict(transform: Callable[[str], str], dct: dict[str, Any]) -> dict[str, Any]:
     return {
-        transform(k): (dict_transform_keys(transform, v) if isinstance(v, dict) else v)
+        transform(k): (_transform_value(transform, v) if isinstance(v, (dict, list, tuple)) else v)
         for k, v in dct.items()
     }
+
+
+def _transform_value(transform: Callable[[str], str], value: Any) -> Any:
+    if isinstance(value, dict):
+        return _transform_dict(transform, value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(
+            _transform_value(transform, v) if isinstance(v, (dict, list, tuple)) else v
+            for v in value
+        )
+    return value
@@ -0,0 +1,55 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+
+from signal_cli_jsonrpc.campaign import Campaign, CampaignOutcome
+from signal_cli_jsonrpc.commands import Send
+from signal_cli_jsonrpc.session import RpcResponseError
+
+RECIPIENTS = [f"+1000000000{i}" for i in range(4)]
+
+
+class FakeSession:
+    "Fails the first `Send` with `error`, and sends every later one successfully"
+
+    def __init__(self, error: Exception) -> None:
+        self.error: Exception | None = error
+        self.sent = list[tuple[str, ...]]()
+
+    async def rpc_result_json(self, command: Send) -> Any:
+        self.sent.append(command.recipients)
+        if error := self.error:
+            self.error = None
+            raise error
+        return {
+            "results": [
+                {
+                    "recipientAddress": {"uuid": None, "number": recipient, "username": None},
+                    "type": "SUCCESS",
+                }
+                for recipient in command.recipients
+            ]
+        }
+
+
+def run_campaign(path: Path, session: FakeSession) -> list[CampaignOutcome]:
+    outcomes = list[CampaignOutcome]()
+    with Campaign(path, "c", Send(message="hi"), RECIPIENTS, chunk_size=4, backoff=0) as campaign:
+        asyncio.run(campaign.run(session, on_outcome=outcomes.append))  # type: ignore[arg-type]
+        assert campaign.progress().remaining == 0
+    return outcomes
+
+
+def test_transport_errors_are_not_resent(tmp_path: Path) -> None:
+    session = FakeSession(TimeoutError())
+    outcomes = run_campaign(tmp_path / "campaign.sqlite3", session)
+    assert session.sent == [tuple(RECIPIENTS)]
+    assert [outcome.recipient for outcome in outcomes] == RECIPIENTS
+    assert all(isinstance(outcome.error, TimeoutError) for outcome in outcomes)
+
+
+def test_rpc_errors_are_retried_in_smaller_chunks(tmp_path: Path) -> None:
+    session = FakeSession(RpcResponseError({"code": -3, "message": "failed"}))
+    outcomes = run_campaign(tmp_path / "campaign.sqlite3", session)
+    assert session.sent == [tuple(RECIPIENTS), tuple(RECIPIENTS[:2]), tuple(RECIPIENTS[2:])]
+    assert all(outcome.ok for outcome in outcomes)
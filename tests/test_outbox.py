@@ -0,0 +1,87 @@
+import asyncio
+import inspect
+import types
+from dataclasses import fields
+from typing import Any, Literal, TypeAliasType, Union, get_args, get_origin, get_overloads
+
+import pytest
+
+from signal_cli_jsonrpc import commands
+from signal_cli_jsonrpc.outbox import Outbox, _dump_command, _load_command
+from signal_cli_jsonrpc.session import RpcCommand
+
+COMMAND_TYPES = [
+    command_type
+    for command_type in vars(commands).values()
+    if isinstance(command_type, type)
+    and issubclass(command_type, RpcCommand)
+    and command_type.__module__ == commands.__name__
+]
+
+
+def sample(annotation: Any) -> Any:
+    "A value of type `annotation` which isn't a default value"
+    origin = get_origin(annotation)
+    if isinstance(origin, TypeAliasType):
+        # (`NonEmptyTuple[T]`)
+        return (sample(get_args(annotation)[0]),)
+    if origin is Literal:
+        return get_args(annotation)[0]
+    if origin in (Union, types.UnionType):
+        return sample(next(arg for arg in get_args(annotation) if arg is not type(None)))
+    if origin is tuple:
+        return (sample(get_args(annotation)[0]),)
+    return {bool: True, int: 1, float: 1.5, str: "x"}[annotation]
+
+
+def command_examples(command_type: type[RpcCommand]) -> list[RpcCommand]:
+    "Each overload's required arguments, or else every field set"
+    if overloads := get_overloads(command_type.__init__):
+        return [
+            command_type(
+                **{
+                    name: sample(parameter.annotation)
+                    for name, parameter in inspect.signature(
+                        overload, eval_str=True
+                    ).parameters.items()
+                    if name != "self" and parameter.default is inspect.Parameter.empty
+                }
+            )
+            for overload in overloads
+        ]
+    annotations = inspect.get_annotations(command_type, eval_str=True)
+    return [command_type(**{f.name: sample(annotations[f.name]) for f in fields(command_type)})]
+
+
+@pytest.mark.parametrize("command_type", COMMAND_TYPES, ids=lambda t: t.__name__)
+def test_commands_round_trip(command_type: type[RpcCommand]) -> None:
+    for command in command_examples(command_type):
+        assert _load_command(*_dump_command(command)) == command
+
+
+def test_load_command_with_all_fields() -> None:
+    # as stored before only fields differing from their defaults were
+    params = '{"recipient": "+1", "trust_all_known_keys": true, "verified_safety_number": null}'
+    command = _load_command("Trust", params)
+    assert command == commands.Trust(recipient="+1", trust_all_known_keys=True)
+
+
+def test_undecodable_command_fails(tmp_path: Any) -> None:
+    async def main() -> None:
+        with Outbox(tmp_path / "outbox.sqlite3") as outbox:
+            id = await outbox.enqueue(commands.SendTyping(recipients=("+1",)))
+            outbox._update("UPDATE outbox SET command = 'NoSuchCommand' WHERE id = ?", (id,))
+            # (no command is sent, so no session is needed)
+            running = asyncio.create_task(outbox.run(None))  # type: ignore[arg-type]
+            while outbox.counts().get("failed") != 1:
+                await asyncio.sleep(0.01)
+            running.cancel()
+            entry = outbox.entry(id)
+            assert entry and entry.command is None and "NoSuchCommand" in (entry.error or "")
+
+    asyncio.run(main())
+
+
+def test_defaults_are_not_stored() -> None:
+    name, params = _dump_command(commands.GetAttachment(id="a", group_id="g"))
+    assert (name, params) == ("GetAttachment", '{"id": "a", "group_id": "g"}')
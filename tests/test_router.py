@@ -0,0 +1,59 @@
+from signal_cli_jsonrpc.cache import RpcCache
+from signal_cli_jsonrpc.commands import ListGroups
+from signal_cli_jsonrpc.directory import Directory
+from signal_cli_jsonrpc.router import Route, Router
+from signal_cli_jsonrpc.session import MessageOrError, event_from_json
+
+
+def event(**messages: object) -> MessageOrError:
+    return event_from_json(
+        {
+            "account": "+10000000000",
+            "envelope": {
+                "source": "u",
+                "sourceNumber": None,
+                "sourceUuid": "u",
+                "sourceName": None,
+                "sourceDevice": 1,
+                "timestamp": 5,
+                "serverReceivedTimestamp": 5,
+                "serverDeliveredTimestamp": 5,
+                **messages,
+            },
+        }
+    )
+
+
+def group_message(revision: int, type: str = "DELIVER") -> MessageOrError:
+    group_info = {"groupId": "g", "groupName": None, "revision": revision, "type": type}
+    return event(
+        dataMessage={
+            "timestamp": 5,
+            "message": "hi",
+            "expiresInSeconds": 0,
+            "groupInfo": group_info,
+        }
+    )
+
+
+def test_typing_routes_match_the_group() -> None:
+    router = Router()
+    router.add(print, Route(kind="typing", group_id="g"))
+    typing = {"action": "STARTED", "timestamp": 5}
+    assert router.handlers(event(typingMessage={**typing, "groupId": "g"})) == [print]
+    assert router.handlers(event(typingMessage=typing)) == []
+
+
+def test_group_revisions_mark_groups_stale() -> None:
+    cache, directory = RpcCache(), Directory()
+    cache._store(ListGroups(), [])
+    for observer in (cache, directory):
+        observer.observe(group_message(1))
+    assert ListGroups() in cache._entries
+    assert directory._stale_group_ids == {"g"}
+
+    directory._stale_group_ids.clear()
+    for observer in (cache, directory):
+        observer.observe(group_message(2))
+    assert ListGroups() not in cache._entries
+    assert directory._stale_group_ids == {"g"}
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from signal_cli_jsonrpc.commands import ListGroups
+from signal_cli_jsonrpc.outputs import Group, GroupMember
+from signal_cli_jsonrpc.session import Message, MessageError, event_from_json, from_json
+from signal_cli_jsonrpc.store import decode_list_result
+from signal_cli_jsonrpc.types import SendMessageResult, SyncMessageType
+
+
+def envelope_json(**messages: object) -> dict[str, object]:
+    return {
+        "account": "+10000000000",
+        "envelope": {
+            "source": "u",
+            "sourceNumber": None,
+            "sourceUuid": "u",
+            "sourceName": None,
+            "sourceDevice": 1,
+            "timestamp": 5,
+            "serverReceivedTimestamp": 5,
+            "serverDeliveredTimestamp": 5,
+            **messages,
+        },
+    }
+
+
+def test_enums_are_decoded_by_name() -> None:
+    event = event_from_json(envelope_json(syncMessage={"type": "CONTACTS_SYNC"}))
+    assert event.envelope and event.envelope.sync_message
+    assert event.envelope.sync_message.type is SyncMessageType.CONTACTS_SYNC
+
+    result = from_json(
+        SendMessageResult,
+        {"recipientAddress": None, "type": "IDENTITY_FAILURE", "token": None, "groupId": None},
+    )
+    assert result.type is SendMessageResult.Type.IDENTITY_FAILURE
+
+
+GROUP_JSON = {
+    "id": "Z3JvdXAtaWQ=",
+    "name": "Group",
+    "description": None,
+    "isMember": True,
+    "isBlocked": False,
+    "messageExpirationTime": 0,
+    "members": [{"number": "+10000000000", "uuid": "u"}],
+    "pendingMembers": [],
+    "requestingMembers": [],
+    "admins": [{"number": "+10000000000", "uuid": "u"}],
+    "banned": [],
+    "permissionAddMember": "EVERY_MEMBER",
+    "permissionEditDetails": "ONLY_ADMINS",
+    "permissionSendMessage": "EVERY_MEMBER",
+    "groupInviteLink": None,
+}
+
+
+def test_list_groups_result_is_decoded() -> None:
+    [group] = decode_list_result(ListGroups(), [GROUP_JSON])
+    assert group.permission_edit_details == "ONLY_ADMINS"
+    assert group.members == [GroupMember(number="+10000000000", uuid="u")]
+
+
+def test_list_groups_result_is_decoded_into_structs() -> None:
+    pytest.importorskip("msgspec")
+    from signal_cli_jsonrpc.structs import from_struct, struct_decoder
+
+    decoder = struct_decoder(list[Group])
+    assert decoder
+    [group] = decoder.decode(json.dumps([GROUP_JSON]))
+    assert from_struct(group) == decode_list_result(ListGroups(), [GROUP_JSON])[0]
+
+
+def test_error_events_are_decoded_as_errors() -> None:
+    event = event_from_json(
+        {
+            "account": "+10000000000",
+            "error": {"message": "untrusted", "type": "UntrustedIdentityException"},
+        }
+    )
+    assert isinstance(event, MessageError)
+    assert event.error and event.error.type == "UntrustedIdentityException"
+    assert isinstance(event_from_json(envelope_json()), Message)